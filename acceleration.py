@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_INTERVALS = ((0, 100), (100, 200))
+
+
+def _seconds(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.timedelta64):
+        return values.astype('timedelta64[ns]').astype(np.int64) / 1e9
+    if values.dtype == object:
+        return pd.to_timedelta(values).total_seconds().to_numpy()
+    return values.astype(np.float64)
+
+
+def _pad(arrays):
+    lengths = np.array([len(a) for a in arrays])
+    padded = np.full((len(arrays), lengths.max()), np.nan)
+    padded[np.arange(lengths.max()) < lengths[:, None]] = np.concatenate(arrays)
+    return padded, lengths
+
+
+def launch_segments(speed, lengths):
+    # The launch is the slowest sample of the lap (the grid slot) and the
+    # acceleration phase ends at the first sample where the speed drops.
+    columns = np.arange(speed.shape[1])
+    launch = np.nanargmin(speed, axis=1)
+
+    decelerating = np.zeros(speed.shape, dtype=bool)
+    decelerating[:, 1:] = np.diff(speed, axis=1) < 0
+    decelerating &= columns > launch[:, None]
+
+    lift = np.where(decelerating.any(axis=1), decelerating.argmax(axis=1), lengths - 1)
+    return launch, lift
+
+
+def speed_crossing_times(time, speed, lengths, target_speeds):
+    # Seconds from the launch until each target speed is first reached,
+    # linearly interpolated between the samples either side of the crossing.
+    # NaN where a driver never reaches a target before lifting.
+    targets = np.asarray(target_speeds, dtype=np.float64)
+    rows = np.arange(speed.shape[0])[:, None]
+    columns = np.arange(speed.shape[1])
+
+    launch, lift = launch_segments(speed, lengths)
+    in_segment = (columns >= launch[:, None]) & (columns <= lift[:, None])
+
+    reached = in_segment[:, :, None] & (speed[:, :, None] >= targets)
+    after = reached.argmax(axis=1)
+    valid = reached.any(axis=1) & (after > launch[:, None])
+    after = np.where(valid, after, launch[:, None] + 1).clip(max=speed.shape[1] - 1)
+    before = after - 1
+
+    speed_before, speed_after = speed[rows, before], speed[rows, after]
+    time_before, time_after = time[rows, before], time[rows, after]
+
+    speed_step = speed_after - speed_before
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(speed_step == 0, 0.0, (targets - speed_before) / speed_step)
+    crossing = time_before + (time_after - time_before) * ratio - time[rows[:, 0], launch][:, None]
+
+    crossing = np.where(valid, crossing, np.nan)
+    crossing[:, targets <= 0] = 0.0
+    return crossing
+
+
+def acceleration_times(telemetry, intervals=DEFAULT_INTERVALS):
+    # telemetry maps a driver to anything with 'Time' and 'Speed' columns
+    # (a FastF1 Telemetry slice or a dict of arrays). Returns one row per
+    # driver with a '<from>-<to> Time' column in seconds per interval.
+    drivers = [drv for drv, data in telemetry.items() if len(data['Speed'])]
+    columns = ['Driver'] + [f"{low}-{high} Time" for low, high in intervals]
+    if not drivers:
+        return pd.DataFrame(columns=columns)
+
+    time, lengths = _pad([_seconds(telemetry[drv]['Time']) for drv in drivers])
+    speed, _ = _pad([np.asarray(telemetry[drv]['Speed'], dtype=np.float64) for drv in drivers])
+
+    targets = sorted({speed_value for interval in intervals for speed_value in interval})
+    crossing = speed_crossing_times(time, speed, lengths, targets)
+    target_index = {target: i for i, target in enumerate(targets)}
+
+    times_df = pd.DataFrame({'Driver': drivers})
+    for (low, high), column in zip(intervals, columns[1:]):
+        times_df[column] = crossing[:, target_index[high]] - crossing[:, target_index[low]]
+    return times_df
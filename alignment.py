@@ -0,0 +1,88 @@
+import numpy as np
+
+from acceleration import _seconds, _pad
+
+
+DEFAULT_CHANNELS = ('Speed', 'Throttle', 'Brake')
+
+
+class AlignedLaps:
+    # Laps of several drivers resampled onto one distance grid. Every channel
+    # is an (n_drivers, n_points) array whose rows follow `drivers`; 'Time' is
+    # the elapsed lap time and 'Delta' the time gained or lost against the
+    # reference driver up to each point of the lap.
+
+    def __init__(self, drivers, distance, channels, reference):
+        self.drivers = drivers
+        self.distance = distance
+        self.channels = channels
+        self.reference = reference
+
+    def __getitem__(self, channel):
+        return self.channels[channel]
+
+
+def lap_distance(time, speed, lengths):
+    # Distance travelled since the first sample, integrated from the speed
+    # trace the same way as FastF1's add_distance().
+    step = np.zeros(time.shape)
+    step[:, 1:] = speed[:, 1:] / 3.6 * np.diff(time, axis=1)
+    step[np.arange(time.shape[1]) >= lengths[:, None]] = 0
+    return np.cumsum(step, axis=1)
+
+
+def _interp_rows(x, y, lengths, grid):
+    # One np.interp call for every driver: each row is shifted along the x
+    # axis past the end of the previous one, so the concatenated rows stay
+    # sorted and no query can land on a neighbouring driver's samples.
+    valid = np.arange(x.shape[1]) < lengths[:, None]
+    offsets = np.arange(x.shape[0])[:, None] * (x[valid].max() + 1)
+    samples = np.interp((grid + offsets).ravel(), (x + offsets)[valid], y[valid])
+    return samples.reshape(x.shape[0], len(grid))
+
+
+def align_laps(telemetry, channels=DEFAULT_CHANNELS, resolution=1.0, reference=None):
+    # telemetry maps a driver to one lap of car data with 'Time', 'Speed' and
+    # the requested channels. The shared grid runs in `resolution` metre
+    # steps up to the end of the shortest lap; `reference` defaults to the
+    # first driver.
+    drivers = [drv for drv, data in telemetry.items() if len(data['Speed'])]
+    if not drivers:
+        raise ValueError("No telemetry samples to align.")
+    reference = reference or drivers[0]
+
+    time, lengths = _pad([_seconds(telemetry[drv]['Time']) for drv in drivers])
+    time -= time[:, :1]
+    speed, _ = _pad([np.asarray(telemetry[drv]['Speed'], dtype=np.float64) for drv in drivers])
+    distance = lap_distance(time, speed, lengths)
+
+    lap_length = distance[np.arange(len(drivers)), lengths - 1].min()
+    grid = np.arange(0, lap_length, resolution)
+
+    aligned = {}
+    for channel in channels:
+        values = speed if channel == 'Speed' else _pad([np.asarray(telemetry[drv][channel], dtype=np.float64)
+                                                       for drv in drivers])[0]
+        aligned[channel] = _interp_rows(distance, values, lengths, grid)
+    aligned['Time'] = _interp_rows(distance, time, lengths, grid)
+    aligned['Delta'] = aligned['Time'] - aligned['Time'][drivers.index(reference)]
+    return AlignedLaps(drivers, grid, aligned, reference)
+
+
+def decimate_minmax(distance, values, buckets):
+    # Keeps the smallest and largest sample of each of `buckets` equal slices
+    # of every row, in their original order, so peaks such as braking points
+    # survive when a long trace is drawn with few points. Returns per-row
+    # (distance, values) arrays of 2 * buckets points.
+    n_rows, n_points = values.shape
+    if 2 * buckets >= n_points:
+        return np.broadcast_to(distance, values.shape), values
+
+    size = -(-n_points // buckets)
+    padded = np.pad(values, ((0, 0), (0, size * buckets - n_points)), mode='edge')
+    padded = padded.reshape(n_rows, buckets, size)
+    low, high = padded.argmin(axis=2), padded.argmax(axis=2)
+
+    index = np.stack([np.minimum(low, high), np.maximum(low, high)], axis=2)
+    index = (index + (np.arange(buckets) * size)[:, None]).reshape(n_rows, -1).clip(max=n_points - 1)
+    return distance[index], values[np.arange(n_rows)[:, None], index]
@@ -0,0 +1,372 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from acceleration import acceleration_times
+from alignment import align_laps, decimate_minmax
+from degradation import stint_fits, driver_pace
+from session_summary import driver_color_mapping, team_color, team_color_mapping
+from timeline import get_timeline_cache
+from tracing import traced
+
+
+COMPOUND_ORDER = ["SOFT", "MEDIUM", "HARD", "INTERMEDIATE", "WET"]
+
+# matplotlib, seaborn, timple and fastf1.plotting are imported by the functions
+# that use them, so opening the dashboard or changing an input does not pay
+# for them, and seaborn only loads with the lap distribution plot.
+_style_lock = threading.Lock()
+_style_applied = False
+
+
+def _subplots(*args, figsize, **kwargs):
+    # Figures are built as matplotlib.figure.Figure instead of through
+    # pyplot, whose global state is not safe to drive from the analysis
+    # service's request threads. The dark style is applied to rcParams once,
+    # before the first figure.
+    global _style_applied
+    import matplotlib.style
+    from matplotlib.figure import Figure
+
+    with _style_lock:
+        if not _style_applied:
+            matplotlib.style.use('dark_background')
+            _style_applied = True
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots(*args, **kwargs)
+
+
+def format_timedelta(td):
+    if pd.isna(td):
+        return ""
+    seconds = td.components.seconds
+    milliseconds = td.components.milliseconds
+    return f"{seconds:01d}.{milliseconds:03d}"
+
+
+# Qualifying delta
+
+@traced('compute.qualifying_delta')
+def qualifying_delta(summary):
+    fastest_laps = summary.dropna(subset=['LapTime']).sort_values(by='LapTime').reset_index(drop=True)
+    if fastest_laps.empty:
+        return fastest_laps, None
+
+    pole_lap = fastest_laps.iloc[0]
+    fastest_laps['LapTimeDelta'] = fastest_laps['LapTime'] - pole_lap['LapTime']
+    return fastest_laps, pole_lap
+
+
+@traced('plot.qualifying_delta')
+def plot_qualifying_delta(fastest_laps, pole_lap, event_name):
+    from timple.timedelta import strftimedelta
+
+    fig, ax = _subplots(figsize=(10, 7))
+    ax.barh(fastest_laps.index, fastest_laps['LapTimeDelta'], color=fastest_laps['TeamColor'].tolist(), edgecolor='grey')
+    ax.set_yticks(fastest_laps.index)
+    ax.set_yticklabels(fastest_laps['Driver'])
+    ax.invert_yaxis()
+    ax.set_axisbelow(True)
+    ax.xaxis.grid(True, which='major', linestyle='--', color='black', zorder=-1000)
+    ax.tick_params(labelsize=12)
+
+    lap_time_string = strftimedelta(pole_lap['LapTime'], '%m:%s.%ms')
+    fig.suptitle(f"{event_name} Qualifying\n"
+                 f"Fastest Lap: {lap_time_string} ({pole_lap['Driver']})")
+    return fig
+
+
+# Sector times
+
+@traced('compute.sector_times')
+def sector_times(summary):
+    return summary.set_index('Driver')[['Sector1Time', 'Sector2Time', 'Sector3Time', 'TeamColor']]
+
+
+@traced('plot.sector_times')
+def plot_sector_times(personal_bests, title):
+    fig, axes = _subplots(3, 1, figsize=(15, 12))
+
+    for sector_number, ax in enumerate(axes, start=1):
+        sector = personal_bests[f'Sector{sector_number}Time'].sort_values()
+        sector_colors = personal_bests.loc[sector.index, 'TeamColor']
+        sector_seconds = sector.dt.total_seconds()
+
+        ax.set_ylim(bottom=sector_seconds.min() - 0.2, top=sector_seconds.max() + 0.2)
+        container = ax.bar(sector.index, sector_seconds, color=sector_colors.tolist(), width=0.75)
+
+        deltas = sector - sector.iloc[0]
+        ax.bar_label(container, labels=deltas.apply(format_timedelta), color='white', padding=2, fontsize=11)
+
+        ax.set_title(f"Sector {sector_number}", fontsize=14)
+        ax.set_ylabel("Time (seconds)", fontsize=17, labelpad=15)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.set_xticks(range(len(sector)))
+        ax.set_xticklabels(sector.index, fontsize=12, weight='bold')
+        ax.tick_params(axis='y', labelsize=15)
+
+    fig.suptitle(title, fontsize=20, fontweight='bold', y=0.98)
+    fig.tight_layout(rect=[0, 0, 1, 0.96])
+    return fig
+
+
+# Qualifying head-to-head
+
+@traced('compute.head_to_head')
+def head_to_head(h2h_data, drivers, resolution=1.0):
+    aligned = align_laps({drv: h2h_data.telemetry[drv] for drv in drivers}, resolution=resolution)
+    colors = {drv: team_color(h2h_data.laps[drv]['Team'], h2h_data.session) for drv in drivers}
+    return aligned, colors
+
+
+@traced('plot.head_to_head')
+def plot_head_to_head(aligned, colors, title, buckets=1500):
+    fig, (ax0, ax1, ax2, ax3) = _subplots(4, 1, figsize=(15, 14), sharex=True,
+                                             gridspec_kw={'height_ratios': [1, 2, 2, 1]})
+
+    for ax, channel in ((ax0, 'Delta'), (ax1, 'Speed'), (ax2, 'Throttle'), (ax3, 'Brake')):
+        distance, values = decimate_minmax(aligned.distance, aligned[channel], buckets)
+        for i, drv in enumerate(aligned.drivers):
+            ax.plot(distance[i], values[i], label=drv, color=colors[drv], linewidth=1.9)
+
+    ax0.axhline(0, color='white', linewidth=0.8, linestyle='--')
+    ax0.set_ylabel(f'Delta to {aligned.reference} (s)', fontsize=15, labelpad=15)
+    ax0.tick_params(axis='y', labelsize=13)
+
+    ax1.legend(loc='lower left', fontsize=10)
+    ax1.set_ylabel('Speed (Km/h)', fontsize=15, labelpad=15)
+    ax1.tick_params(axis='y', labelsize=13)
+
+    ax2.set_ylabel('Throttle (%)', fontsize=15, labelpad=15)
+    ax2.tick_params(axis='y', labelsize=13)
+
+    ax3.set_ylabel('Brake', fontsize=15, labelpad=15)
+    ax3.set_xlabel('Distance (m)', labelpad=20)
+    ax3.tick_params(axis='y', labelsize=13)
+
+    fig.suptitle(title, fontsize=20, fontweight='bold', y=0.95)
+    fig.subplots_adjust(top=0.90)
+    return fig
+
+
+# Race lap distribution
+
+@traced('compute.lap_distribution')
+def lap_distribution(race, top=10):
+    import fastf1.plotting
+
+    point_finishers = race.drivers[:top]
+
+    driver_laps = race.laps.pick_drivers(point_finishers).pick_quicklaps()
+    driver_laps = driver_laps.reset_index()
+    driver_laps["LapTime(s)"] = driver_laps["LapTime"].dt.total_seconds()
+
+    finishing_order = [race.get_driver(i)['Abbreviation'] for i in point_finishers]
+    driver_palette = driver_color_mapping(race)
+    compound_palette = fastf1.plotting.get_compound_mapping(session=race)
+    return driver_laps, finishing_order, driver_palette, compound_palette
+
+
+@traced('plot.lap_distribution')
+def plot_lap_distribution(driver_laps, finishing_order, driver_palette, compound_palette, title):
+    import seaborn as sns
+
+    fig, ax = _subplots(figsize=(13, 7))
+
+    sns.violinplot(data=driver_laps,
+                   x="Driver",
+                   y="LapTime(s)",
+                   hue="Driver",
+                   inner=None,
+                   density_norm="area",
+                   order=finishing_order,
+                   palette=driver_palette,
+                   ax=ax,
+                   )
+
+    sns.swarmplot(data=driver_laps,
+                  x="Driver",
+                  y="LapTime(s)",
+                  order=finishing_order,
+                  hue="Compound",
+                  palette=compound_palette,
+                  hue_order=COMPOUND_ORDER,
+                  linewidth=0,
+                  size=3.5,
+                  ax=ax,
+                  )
+
+    ax.set_xlabel('Driver', fontsize=15, labelpad=15)
+    ax.tick_params(labelsize=13)
+    ax.set_ylabel('Lap Times', fontsize=15, labelpad=15)
+    ax.legend(loc="upper left", fontsize=8)
+    fig.suptitle(title, fontsize=20, fontweight='bold', y=0.97)
+    return fig
+
+
+# Acceleration times
+
+@traced('compute.acceleration')
+def acceleration(lap_one):
+    times_df = acceleration_times(lap_one.telemetry, intervals=((0, 100), (100, 200))).dropna()
+    times_df['Team'] = [lap_one.laps[driver]['Team'].iloc[0] for driver in times_df['Driver']]
+
+    times_df['0-100 Time'] = times_df['0-100 Time'].round(2)
+    times_df['100-200 Time'] = times_df['100-200 Time'].round(2)
+    times_df['Total Time'] = (times_df['0-100 Time'] + times_df['100-200 Time']).round(2)
+    times_df = times_df.sort_values(by=['Total Time', '0-100 Time']).reset_index(drop=True)
+
+    times_df['TeamColor'] = times_df['Team'].map(team_color_mapping(times_df['Team'], lap_one.session))
+    return times_df
+
+
+@traced('plot.acceleration')
+def plot_acceleration(times_df, title):
+    fig, ax = _subplots(figsize=(16, 9))
+
+    bar1 = ax.bar(times_df['Driver'], times_df['0-100 Time'], color=times_df['TeamColor'].tolist())
+
+    bar2 = ax.bar(
+        times_df['Driver'],
+        times_df['100-200 Time'],
+        bottom=times_df['0-100 Time'],
+        color=times_df['TeamColor'].tolist(),
+        hatch='//',
+        edgecolor='white',
+        alpha=0.7
+    )
+
+    ax.bar_label(bar1, label_type='center', fmt='%.2f', fontweight='bold', color='black', fontsize=12)
+
+    total_time_labels = [f"{total:.2f}" for total in times_df['Total Time']]
+    ax.bar_label(bar2, labels=total_time_labels, label_type='edge', padding=3, fontweight='bold', fontsize=12)
+
+    ax.set_ylabel('Time')
+    ax.get_yaxis().set_visible(False)
+    ax.spines[['left', 'top', 'right']].set_visible(False)
+    fig.tight_layout()
+    fig.suptitle(title, fontsize=20, fontweight='bold', y=1.1)
+    return fig
+
+
+# Race pace and tyre degradation
+
+@traced('compute.race_pace')
+def race_pace(race):
+    import fastf1.plotting
+
+    laps = race.laps.pick_quicklaps().pick_wo_box()
+    stints = stint_fits(laps, total_laps=int(race.laps['LapNumber'].max()))
+    pace = driver_pace(stints)
+    pace['TeamColor'] = pace['Team'].map(team_color_mapping(pace['Team'].dropna(), race))
+    compound_palette = fastf1.plotting.get_compound_mapping(session=race)
+    return pace, stints, compound_palette
+
+
+@traced('plot.race_pace')
+def plot_race_pace(pace, stints, compound_palette, title):
+    fig, (ax1, ax2) = _subplots(1, 2, figsize=(18, 9), gridspec_kw={'width_ratios': [1, 1]})
+
+    ax1.barh(pace['Driver'], pace['Gap'], color=pace['TeamColor'].fillna('grey').tolist())
+    ax1.invert_yaxis()
+    for i, gap in enumerate(pace['Gap']):
+        ax1.text(gap, i, f" +{gap:.3f}", va='center', fontsize=10)
+    ax1.set_xlabel('Fuel-Corrected Gap to Fastest (s/lap)', fontsize=13)
+    ax1.set_title('Race Pace', fontsize=15)
+    ax1.spines[['top', 'right']].set_visible(False)
+
+    position = dict(zip(pace['Driver'], range(len(pace))))
+    fitted = stints.dropna(subset=['Degradation'])
+    fitted = fitted[fitted['Driver'].isin(position)]
+    for compound in [compound for compound in COMPOUND_ORDER if compound in set(fitted['Compound'])]:
+        rows = fitted[fitted['Compound'] == compound]
+        ax2.scatter(rows['Degradation'], rows['Driver'].map(position), s=rows['Laps'] * 8,
+                    color=compound_palette.get(compound, 'grey'), label=compound, edgecolor='white', linewidth=0.5)
+    ax2.axvline(0, color='white', linewidth=0.8, linestyle='--')
+    ax2.set_yticks(range(len(pace)))
+    ax2.set_yticklabels(pace['Driver'])
+    ax2.set_ylim(len(pace) - 0.5, -0.5)
+    ax2.set_xlabel('Degradation (s/lap of tyre age)', fontsize=13)
+    ax2.set_title('Stint Degradation (marker size = laps)', fontsize=15)
+    ax2.legend(loc='lower right', fontsize=9)
+
+    fig.suptitle(title, fontsize=20, fontweight='bold')
+    fig.tight_layout()
+    return fig
+
+
+# Race timeline
+
+@traced('compute.race_timeline')
+def race_timeline(race, timelines=None):
+    timeline = (timelines or get_timeline_cache()).get(race)
+    driver_palette = driver_color_mapping(race)
+    return timeline, driver_palette
+
+
+@traced('plot.race_timeline')
+def plot_race_timeline(timeline, driver_palette, title, max_gap=90):
+    fig, (ax1, ax2) = _subplots(2, 1, figsize=(16, 14), sharex=True, gridspec_kw={'height_ratios': [3, 2]})
+
+    # Teammates share a colour, the second driver of a team is dashed.
+    seen = set()
+    for i in timeline.finishing_order():
+        drv = timeline.drivers[i]
+        color = driver_palette.get(drv, 'grey')
+        style = '--' if color in seen else '-'
+        seen.add(color)
+        ax1.plot(timeline.lap_numbers, timeline.gaps[i], color=color, linestyle=style, linewidth=1.5, label=drv)
+        ax2.plot(timeline.lap_numbers, timeline.positions[i], color=color, linestyle=style, linewidth=1.5)
+
+        last = np.flatnonzero(np.isfinite(timeline.positions[i]))
+        if len(last):
+            ax2.text(timeline.lap_numbers[last[-1]] + 0.5, timeline.positions[i, last[-1]], drv,
+                     color=color, va='center', fontsize=9)
+
+    # Lapped and retired cars would stretch the axis far beyond the fight for
+    # the lead, so the gap axis stops at max_gap seconds.
+    ax1.set_ylim(min(np.nanmax(timeline.gaps), max_gap), -1)
+    ax1.set_ylabel('Gap to Leader (s)', fontsize=13)
+    ax1.legend(loc='lower left', ncol=10, fontsize=9)
+    ax1.grid(True, linestyle='--', alpha=0.3)
+
+    ax2.set_ylim(len(timeline) + 0.5, 0.5)
+    ax2.set_yticks(range(1, len(timeline) + 1))
+    ax2.set_ylabel('Position', fontsize=13)
+    ax2.set_xlabel('Lap', fontsize=13)
+    ax2.grid(True, axis='x', linestyle='--', alpha=0.3)
+    ax2.spines[['top', 'right']].set_visible(False)
+
+    fig.suptitle(title, fontsize=20, fontweight='bold')
+    fig.tight_layout()
+    return fig
+
+
+# Season trends
+
+@traced('plot.season_trends')
+def plot_season_trends(quali_gaps, race_pace, team_colors, rounds, title):
+    fig, (ax1, ax2) = _subplots(1, 2, figsize=(18, 8), gridspec_kw={'width_ratios': [2, 1]})
+
+    for team in quali_gaps.columns:
+        ax1.plot(quali_gaps.index, quali_gaps[team], marker='o', label=team, color=team_colors.get(team))
+    ax1.set_xticks(quali_gaps.index)
+    ax1.set_xticklabels([rounds.get(r, r) for r in quali_gaps.index], rotation=60, ha='right')
+    ax1.invert_yaxis()
+    ax1.set_ylabel('Gap to Pole (%)', fontsize=13)
+    ax1.set_title('Qualifying Gap to Pole', fontsize=15)
+    ax1.legend(loc="lower left", fontsize=8)
+
+    ax2.barh(race_pace['Team'], race_pace['PaceDelta'],
+             color=[team_colors.get(team, 'grey') for team in race_pace['Team']])
+    ax2.invert_yaxis()
+    ax2.set_xlabel('Average Gap to Fastest Team Median (s)', fontsize=13)
+    ax2.set_title('Race Pace', fontsize=15)
+    for i, delta in enumerate(race_pace['PaceDelta']):
+        ax2.text(delta, i, f" +{delta:.3f}", va='center', fontsize=10)
+
+    fig.suptitle(title, fontsize=20, fontweight='bold')
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,169 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from session_cache import get_cache, session_key
+from telemetry_store import get_telemetry_store
+from tracing import get_tracer
+
+
+STAGES = ('laps', 'results', 'car data', 'position data')
+
+# FastF1 parses results together with the laps and position data together
+# with car data, so the stages complete in pairs: first the laps-only load,
+# then the telemetry upgrade of the same cache entry.
+_STEPS = (
+    (('laps', 'results'), False),
+    (('car data', 'position data'), True),
+)
+
+DEFAULT_SESSION_TYPES = ('Q', 'R')
+
+
+def required_stages(spec):
+    # The stages a LoadSpec reads; telemetry is sliced from both car and
+    # position data only when both channels are requested.
+    stages = ['laps', 'results']
+    if 'car' in spec.channels:
+        stages.append('car data')
+    if 'pos' in spec.channels:
+        stages.append('position data')
+    return tuple(stages)
+
+
+class LoadJob:
+    # Progress of one session being loaded into the session cache. Each stage
+    # is 'pending', 'running', 'done' or 'failed', or 'not requested' for the
+    # telemetry stages of a laps-only job.
+
+    def __init__(self, year, event, session_type, telemetry):
+        self.year = year
+        self.event = event
+        self.session_type = session_type
+        self.telemetry = telemetry
+        self.stages = {stage: 'pending' if telemetry or stage in _STEPS[0][0] else 'not requested'
+                       for stage in STAGES}
+        self.error = None
+        self.finished = False
+        self._changed = threading.Condition()
+
+    def _set(self, stages, state):
+        with self._changed:
+            for stage in stages:
+                self.stages[stage] = state
+            self._changed.notify_all()
+
+    def _finish(self, error=None):
+        with self._changed:
+            self.error = error
+            self.finished = True
+            self._changed.notify_all()
+
+    def covers(self, stages):
+        # Whether this job loads `stages` at all; laps-only jobs stop before
+        # the telemetry stages.
+        return self.telemetry or all(stage in _STEPS[0][0] for stage in stages)
+
+    def ready(self, stages=STAGES):
+        with self._changed:
+            return all(self.stages[stage] == 'done' for stage in stages)
+
+    def progress(self):
+        with self._changed:
+            wanted = [stage for stage in STAGES if self.telemetry or stage in _STEPS[0][0]]
+            return sum(self.stages[stage] == 'done' for stage in wanted) / len(wanted)
+
+    def snapshot(self):
+        with self._changed:
+            return dict(self.stages)
+
+    def state(self):
+        # JSON-ready state, as the analysis service reports it at /job.
+        with self._changed:
+            return {'session_type': self.session_type, 'telemetry': self.telemetry, 'stages': dict(self.stages),
+                    'error': None if self.error is None else str(self.error), 'finished': self.finished}
+
+    def wait(self, stages=STAGES, on_progress=None, interval=0.25):
+        # Blocks until `stages` are loaded or the job has ended, calling
+        # on_progress(job) every `interval` seconds. Returns whether the
+        # stages are ready; a failed job returns False and leaves the error
+        # to be raised by the caller's own load().
+        with self._changed:
+            while not all(self.stages[stage] == 'done' for stage in stages) and not self.finished:
+                if on_progress is not None:
+                    self._changed.release()
+                    try:
+                        on_progress(self)
+                    finally:
+                        self._changed.acquire()
+                self._changed.wait(interval)
+            return all(self.stages[stage] == 'done' for stage in stages)
+
+
+class BackgroundLoader:
+    # Loads sessions into the shared session cache from worker threads, so a
+    # tab only waits for the stages it reads while the rest keeps loading.
+
+    def __init__(self, cache=None, workers=2, store=None):
+        self.cache = cache or get_cache()
+        self.store = store or get_telemetry_store()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="f1-loader")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, year, event, session_types=DEFAULT_SESSION_TYPES, telemetry=False):
+        # Starts one job per session type. A job that is running or finished
+        # without an error is reused; failed jobs are started again. Laps are
+        # enough for most tabs, so telemetry is only loaded when asked for
+        # (a tab waiting for car data restarts its session's job with it).
+        jobs = []
+        with self._lock:
+            for session_type in session_types:
+                key = session_key(year, event, session_type)
+                job = self._jobs.get(key)
+                if job is None or job.error is not None or (telemetry and not job.telemetry):
+                    job = LoadJob(year, event, session_type, telemetry)
+                    self._jobs[key] = job
+                    self._executor.submit(self._run, job)
+                jobs.append(job)
+        return jobs
+
+    def job(self, year, event, session_type):
+        with self._lock:
+            return self._jobs.get(session_key(year, event, session_type))
+
+    def _run(self, job):
+        with get_tracer().trace('background', year=job.year, event=job.event, session=job.session_type):
+            self._load(job)
+
+    def _stored(self, job):
+        round_number, _, _ = self.cache.source.event_info(job.year, job.event, job.session_type)
+        return self.store.has(job.year, round_number, job.session_type)
+
+    def _load(self, job):
+        for stages, telemetry in _STEPS:
+            if telemetry and not job.telemetry:
+                break
+            job._set(stages, 'running')
+            try:
+                # load() reads car data from the telemetry store when it has
+                # the session, so the session's own telemetry is not needed.
+                if not (telemetry and self._stored(job)):
+                    self.cache.get(job.year, job.event, job.session_type, telemetry=telemetry)
+            except Exception as e:
+                job._set(stages, 'failed')
+                job._finish(e)
+                return
+            job._set(stages, 'done')
+        job._finish()
+
+
+_shared_loader = None
+_shared_lock = threading.Lock()
+
+
+def get_loader():
+    global _shared_loader
+    with _shared_lock:
+        if _shared_loader is None:
+            _shared_loader = BackgroundLoader()
+        return _shared_loader
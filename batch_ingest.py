@@ -0,0 +1,166 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+import pandas as pd
+import fastf1 as ff1
+
+
+# Headless warm-up for whole seasons: every task loads one session in its own
+# worker process, so a hung download can be terminated without stalling the
+# batch, and finished tasks are appended to a checkpoint file so an
+# interrupted run picks up where it stopped.
+
+RACE_WEEKEND = ('Q', 'R')
+SPRINT_SESSIONS = {
+    'sprint': ('S',),
+    'sprint_shootout': ('SS', 'S'),
+    'sprint_qualifying': ('SQ', 'S'),
+}
+
+
+def parse_years(text):
+    first, _, last = text.partition('-')
+    return list(range(int(first), int(last or first) + 1))
+
+
+def enumerate_tasks(years, sprint=False):
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    tasks = []
+    for year in years:
+        schedule = ff1.get_event_schedule(year, include_testing=False)
+        for _, event in schedule.iterrows():
+            if event['EventDate'] > now:
+                continue
+            session_types = RACE_WEEKEND
+            if sprint:
+                session_types = SPRINT_SESSIONS.get(event['EventFormat'], ()) + session_types
+            for session_type in session_types:
+                tasks.append((year, int(event['RoundNumber']), session_type))
+    return tasks
+
+
+def _task_key(task):
+    year, round_number, session_type = task
+    return f"{year}-{round_number:02d}-{session_type}"
+
+
+def read_checkpoint(path):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record['status'] == 'done':
+                done.add(record['task'])
+    return done
+
+
+def _append_checkpoint(path, record):
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def _worker(task, options, results):
+    year, round_number, session_type = task
+    try:
+        from data_source import LiveSource
+        from summary_store import SummaryStore, ingest
+
+        session = LiveSource(options['cache_dir']).get_session(year, round_number, session_type)
+        session.load()
+        ingest(session, session_type, SummaryStore(options['summary_db']))
+
+        if options['telemetry_store']:
+            from telemetry_store import TelemetryStore
+            TelemetryStore(options['telemetry_store']).write(session)
+
+        if options['snapshots']:
+            from replay import record_session
+            record_session(session, options['snapshots'])
+
+        results.put((task, 'done', session.event['EventName']))
+    except Exception as e:
+        results.put((task, 'failed', f"{type(e).__name__}: {e}"))
+
+
+def run(tasks, options, workers, timeout, checkpoint):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    pending = list(tasks)
+    running = {}
+    finished = failed = 0
+
+    def report(task, status, detail, started):
+        nonlocal finished, failed
+        elapsed = time.monotonic() - started
+        finished += 1
+        failed += status != 'done'
+        _append_checkpoint(checkpoint, {'task': _task_key(task), 'status': status, 'detail': detail,
+                                        'seconds': round(elapsed, 1)})
+        print(f"[{finished}/{len(tasks)}] {_task_key(task)} {status} in {elapsed:.1f}s "
+              f"({len(running)} running, {failed} failed) {detail}", flush=True)
+
+    while pending or running:
+        while pending and len(running) < workers:
+            task = pending.pop(0)
+            process = context.Process(target=_worker, args=(task, options, results), daemon=True)
+            process.start()
+            running[task] = (process, time.monotonic())
+
+        try:
+            task, status, detail = results.get(timeout=1)
+        except queue.Empty:
+            task = None
+        if task in running:
+            process, started = running.pop(task)
+            process.join()
+            report(task, status, detail, started)
+
+        for task, (process, started) in list(running.items()):
+            if time.monotonic() - started > timeout:
+                process.terminate()
+                process.join()
+                del running[task]
+                report(task, 'timeout', f"exceeded {timeout}s", started)
+            elif not process.is_alive() and process.exitcode != 0:
+                del running[task]
+                report(task, 'failed', f"worker exited with code {process.exitcode}", started)
+
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and summarise every R/Q session of one or more seasons.")
+    parser.add_argument("years", help="Season or range of seasons, e.g. 2023 or 2021-2024")
+    parser.add_argument("--sprint", action="store_true", help="Also load sprint and sprint qualifying sessions")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds before a session's worker is terminated")
+    parser.add_argument("--checkpoint", default="ingest_checkpoint.jsonl")
+    parser.add_argument("--cache-dir", default=os.environ.get("F1_CACHE_DIR"), help="FastF1 HTTP cache directory")
+    parser.add_argument("--summary-db", default=os.environ.get("F1_SUMMARY_DB", "f1_summary.sqlite"))
+    parser.add_argument("--snapshots", help="Also record replay snapshots into this directory")
+    parser.add_argument("--telemetry-store", default=os.environ.get("F1_TELEMETRY_STORE"),
+                        help="Also write per-lap car data channels into this telemetry store directory")
+    args = parser.parse_args()
+
+    if args.cache_dir:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        ff1.Cache.enable_cache(args.cache_dir)
+
+    done = read_checkpoint(args.checkpoint)
+    tasks = [task for task in enumerate_tasks(parse_years(args.years), args.sprint) if _task_key(task) not in done]
+    print(f"{len(tasks)} sessions to load ({len(done)} already done), {args.workers} workers", flush=True)
+
+    options = {'cache_dir': args.cache_dir, 'summary_db': args.summary_db, 'snapshots': args.snapshots,
+               'telemetry_store': args.telemetry_store}
+    failed = run(tasks, options, args.workers, args.timeout, args.checkpoint)
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acceleration import acceleration_times
+from compare import argument_parser, assert_frames_close, compare
+
+
+def synthetic_lap_one(n_drivers=20, samples=450, seed=0):
+    # Lap 1 car data shaped like FastF1's: a few stationary samples on the
+    # grid, a launch up to the first braking zone, then the rest of the lap.
+    rng = np.random.default_rng(seed)
+    telemetry = {}
+    for i in range(n_drivers):
+        time = np.cumsum(rng.uniform(0.2, 0.28, samples))
+        grid = rng.integers(3, 12)
+        launch = time - time[grid]
+        speed = np.where(launch > 0, 320 * (1 - np.exp(-launch / (5 + rng.uniform(-0.4, 0.4)))), 0)
+        brake = grid + rng.integers(50, 70)
+        speed[brake:] = speed[brake] - 120 * np.abs(np.sin(np.arange(samples - brake) / 25)) - 1
+        telemetry[f"D{i:02d}"] = pd.DataFrame({
+            'Time': pd.to_timedelta(time, unit='s'),
+            'Speed': np.round(speed),
+        })
+    return telemetry
+
+
+def legacy_acceleration_times(telemetry):
+    # The per-driver pandas implementation the acceleration tab used before
+    # the batched engine.
+    all_drivers_telemetry = []
+    for driver, driver_data in telemetry.items():
+        driver_data = driver_data.loc[:, ['Time', 'Speed']]
+        start_index = driver_data['Speed'].idxmin()
+        acc_phase = driver_data.loc[start_index:]
+        dec_phase = acc_phase['Speed'].diff() < 0
+        end_index = dec_phase.idxmax()
+        final_df = driver_data.loc[start_index:end_index].copy()
+        final_df['Driver'] = driver
+        all_drivers_telemetry.append(final_df)
+
+    drivers_telemetry = pd.concat(all_drivers_telemetry)
+
+    def get_time_for_speed(df, target_speed):
+        try:
+            point_before = df[df['Speed'] < target_speed].iloc[-1]
+            point_after = df[df['Speed'] >= target_speed].iloc[0]
+
+            time_before = point_before['Time']
+            speed_before = point_before['Speed']
+            time_after = point_after['Time']
+            speed_after = point_after['Speed']
+
+            if speed_after == speed_before:
+                return time_before
+
+            speed_ratio = (target_speed - speed_before) / (speed_after - speed_before)
+            time_diff = time_after - time_before
+
+            return time_before + (time_diff * speed_ratio)
+        except IndexError:
+            return None
+
+    acceleration_results = {}
+    for driver_name in drivers_telemetry['Driver'].unique():
+        driver_df = drivers_telemetry[drivers_telemetry['Driver'] == driver_name].copy()
+
+        start_index = driver_df['Speed'].idxmin()
+        acceleration_df = driver_df.loc[start_index:]
+        deceleration_series = acceleration_df['Speed'].diff() < 0
+
+        if deceleration_series.any():
+            end_index = deceleration_series.idxmax()
+            final_df = acceleration_df.loc[start_index:end_index]
+        else:
+            final_df = acceleration_df
+
+        start_time = final_df.iloc[0]['Time']
+        time_at_100 = get_time_for_speed(final_df, 100)
+        time_at_200 = get_time_for_speed(final_df, 200)
+
+        if time_at_100 and time_at_200:
+            acceleration_results[driver_name] = {
+                '0-100 Time': (time_at_100 - start_time).total_seconds(),
+                '100-200 Time': (time_at_200 - time_at_100).total_seconds(),
+            }
+
+    times_df = pd.DataFrame.from_dict(acceleration_results, orient='index')
+    times_df.index.name = 'Driver'
+    return times_df.reset_index()
+
+
+def main():
+    parser = argument_parser("Benchmark the batched acceleration engine against the legacy loop.")
+    parser.add_argument("--drivers", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=450)
+    args = parser.parse_args()
+
+    telemetry = synthetic_lap_one(args.drivers, args.samples)
+
+    assert_frames_close(acceleration_times(telemetry).dropna(), legacy_acceleration_times(telemetry), 'Driver')
+
+    compare(f"{args.drivers} drivers x {args.samples} samples",
+            lambda: legacy_acceleration_times(telemetry), lambda: acceleration_times(telemetry),
+            "batched engine", args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alignment import align_laps, decimate_minmax
+from compare import argument_parser, best_time, compare
+
+
+def synthetic_fastest_laps(n_drivers=2, samples=800, seed=0):
+    # Car data for one flying lap per driver, sampled at uneven intervals
+    # like FastF1's car data so no two drivers share a time or distance grid.
+    rng = np.random.default_rng(seed)
+    telemetry = {}
+    for i in range(n_drivers):
+        time = np.concatenate([[0.0], np.cumsum(rng.uniform(0.2, 0.3, samples - 1))])
+        phase = np.linspace(0, 12 * np.pi, samples) + rng.uniform(-0.1, 0.1)
+        speed = 220 + 90 * np.sin(phase) + rng.normal(0, 2, samples)
+        telemetry[f"D{i:02d}"] = pd.DataFrame({
+            'Time': pd.to_timedelta(time, unit='s'),
+            'Speed': np.round(speed),
+            'Throttle': np.clip(100 * np.sin(phase) + 60, 0, 100),
+            'Brake': np.sin(phase) < -0.6,
+        })
+    return telemetry
+
+
+def legacy_align(telemetry, resolution=1.0):
+    # Per-driver pandas alignment: add the distance column the way
+    # add_distance() does and interpolate each channel separately.
+    frames = {}
+    for drv, data in telemetry.items():
+        data = data.copy()
+        seconds = data['Time'].dt.total_seconds()
+        data['Distance'] = (data['Speed'] / 3.6 * seconds.diff().fillna(0)).cumsum()
+        data['Seconds'] = seconds - seconds.iloc[0]
+        frames[drv] = data
+
+    grid = np.arange(0, min(data['Distance'].iloc[-1] for data in frames.values()), resolution)
+    aligned = {}
+    for drv, data in frames.items():
+        aligned[drv] = pd.DataFrame({
+            channel: np.interp(grid, data['Distance'], data[channel].astype(float))
+            for channel in ('Speed', 'Throttle', 'Brake', 'Seconds')
+        })
+    return grid, aligned
+
+
+def main():
+    parser = argument_parser("Benchmark the batched lap alignment against a per-driver loop.")
+    parser.add_argument("--drivers", type=int, default=2)
+    parser.add_argument("--samples", type=int, default=800)
+    parser.add_argument("--resolution", type=float, default=1.0)
+    parser.add_argument("--buckets", type=int, default=1500)
+    args = parser.parse_args()
+
+    telemetry = synthetic_fastest_laps(args.drivers, args.samples)
+
+    grid, legacy = legacy_align(telemetry, args.resolution)
+    aligned = align_laps(telemetry, resolution=args.resolution)
+    np.testing.assert_allclose(aligned.distance, grid)
+    for i, drv in enumerate(aligned.drivers):
+        np.testing.assert_allclose(aligned['Speed'][i], legacy[drv]['Speed'], atol=1e-6)
+        np.testing.assert_allclose(aligned['Time'][i], legacy[drv]['Seconds'], atol=1e-6)
+
+    compare(f"{args.drivers} drivers x {args.samples} samples -> {len(aligned.distance)} points at {args.resolution} m",
+            lambda: legacy_align(telemetry, args.resolution), lambda: align_laps(telemetry, resolution=args.resolution),
+            "batched align", args.repeat)
+    decimate_time = best_time(lambda: decimate_minmax(aligned.distance, aligned['Speed'], args.buckets), args.repeat)
+    print(f"min/max decimate:{decimate_time * 1000:8.2f} ms ({2 * args.buckets} points per driver)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compare import argument_parser, assert_frames_close, compare
+from degradation import FUEL_EFFECT, MIN_STINT_LAPS, driver_pace, stint_fits
+
+
+COMPOUNDS = ('SOFT', 'MEDIUM', 'HARD')
+
+
+def synthetic_race_laps(n_drivers=20, total_laps=70, seed=0):
+    # Representative laps of a race shaped like race.laps: two or three
+    # stints per driver, a base pace per driver, a fuel effect and a linear
+    # tyre wear per compound plus noise, with some laps missing.
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_drivers):
+        stops = np.sort(rng.choice(np.arange(12, total_laps - 10), size=rng.integers(1, 3), replace=False))
+        bounds = np.concatenate([[1], stops + 1, [total_laps + 1]])
+        laps = np.arange(1, total_laps + 1)
+        stint = np.searchsorted(bounds, laps, side='right')
+        tyre_life = laps - bounds[stint - 1] + 1
+        compound = np.array(COMPOUNDS)[(stint + i) % 3]
+        wear = np.select([compound == 'SOFT', compound == 'MEDIUM'], [0.09, 0.05], 0.03)
+        seconds = (92 + rng.uniform(0, 1.5) + FUEL_EFFECT * (total_laps - laps) + wear * tyre_life
+                   + rng.normal(0, 0.2, total_laps))
+        keep = rng.random(total_laps) > 0.08
+        frames.append(pd.DataFrame({
+            'Driver': f"D{i:02d}",
+            'Team': f"Team {i // 2}",
+            'LapNumber': laps[keep].astype(float),
+            'Stint': stint[keep].astype(float),
+            'Compound': compound[keep],
+            'TyreLife': tyre_life[keep].astype(float),
+            'LapTime': pd.to_timedelta(seconds[keep], unit='s'),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def legacy_stint_fits(laps, total_laps, fuel_effect=FUEL_EFFECT, min_laps=MIN_STINT_LAPS):
+    # Per-driver, per-stint loop with np.polyfit, the way the acceleration
+    # tab used to be written.
+    rows = []
+    for driver in laps['Driver'].unique():
+        driver_laps = laps[laps['Driver'] == driver]
+        for stint in driver_laps['Stint'].dropna().unique():
+            stint_laps = driver_laps[driver_laps['Stint'] == stint].dropna(subset=['LapTime', 'TyreLife'])
+            if len(stint_laps) < min_laps:
+                continue
+            corrected = (stint_laps['LapTime'].dt.total_seconds()
+                         - fuel_effect * (total_laps - stint_laps['LapNumber']))
+            slope, intercept = np.polyfit(stint_laps['TyreLife'], corrected, 1)
+            rows.append({'Driver': driver, 'Stint': int(stint), 'Degradation': slope, 'Intercept': intercept})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argument_parser("Benchmark the grouped stint regressions against a per-driver loop.")
+    parser.add_argument("--drivers", type=int, default=20)
+    parser.add_argument("--laps", type=int, default=70)
+    args = parser.parse_args()
+
+    laps = synthetic_race_laps(args.drivers, args.laps)
+
+    grouped = stint_fits(laps, args.laps)
+    assert_frames_close(grouped, legacy_stint_fits(laps, args.laps), ['Driver', 'Stint'])
+
+    compare(f"{args.drivers} drivers x {args.laps} laps, {len(grouped)} stints",
+            lambda: legacy_stint_fits(laps, args.laps), lambda: driver_pace(stint_fits(laps, args.laps)),
+            "grouped fits", args.repeat)
+
+
+if __name__ == "__main__":
+    main()
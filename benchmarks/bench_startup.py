@@ -0,0 +1,58 @@
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load when a plot needs them.
+HEAVY_MODULES = ('fastf1', 'fastf1.plotting', 'matplotlib.pyplot', 'seaborn', 'timple')
+
+_PROBE = """
+import sys, time
+started = time.perf_counter()
+{imports}
+print(time.perf_counter() - started)
+print(','.join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def app_imports(path=os.path.join(ROOT, "f1_analysis.py")):
+    # The top-level import statements of the dashboard script, i.e. what a
+    # cold start executes before the first widget is drawn.
+    tree = ast.parse(open(path).read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def cold_import(imports):
+    # (seconds, eagerly loaded heavy modules) in a fresh interpreter.
+    probe = _PROBE.format(imports="\n".join(imports), heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    seconds, loaded = result.stdout.strip().split("\n")
+    return float(seconds), [name for name in loaded.split(",") if name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold-start import time of the dashboard.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--without-streamlit", action="store_true",
+                        help="leave out Streamlit's own import to time the dashboard modules alone")
+    args = parser.parse_args()
+
+    imports = app_imports()
+    if args.without_streamlit:
+        imports = [statement for statement in imports if "streamlit" not in statement]
+
+    runs = [cold_import(imports) for _ in range(args.repeat)]
+    times = [seconds for seconds, _ in runs]
+
+    print(f"{len(imports)} import statements, {args.repeat} fresh interpreters")
+    print(f"cold import min:    {min(times) * 1000:8.1f} ms")
+    print(f"cold import median: {statistics.median(times) * 1000:8.1f} ms")
+    print(f"heavy modules loaded at startup: {', '.join(runs[-1][1]) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compare import argument_parser, compare
+from timeline import build_timeline
+
+
+def synthetic_race_laps(n_drivers=20, total_laps=70, seed=0):
+    # race.laps-shaped rows: lap end times in session time after a formation
+    # lap, a pit stop per driver, one retirement and one lapped car.
+    rng = np.random.default_rng(seed)
+    start = 3600.0
+    frames = []
+    for i in range(n_drivers):
+        lap_times = 92 + i * 0.05 + rng.normal(0, 0.4, total_laps)
+        lap_times[rng.integers(15, total_laps - 15)] += 21
+        laps = total_laps - 1 if i == n_drivers - 1 else total_laps
+        laps = total_laps // 2 if i == n_drivers - 2 else laps
+        ends = start + 0.3 * i + np.cumsum(lap_times)[:laps]
+        frames.append(pd.DataFrame({
+            'Driver': f"D{i:02d}",
+            'LapNumber': np.arange(1, laps + 1, dtype=float),
+            'LapStartTime': pd.to_timedelta(np.concatenate([[start], ends[:-1]]), unit='s'),
+            'Time': pd.to_timedelta(ends, unit='s'),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def legacy_timeline(laps):
+    # Lap by lap and driver by driver, the way a timeline is built from
+    # race.laps without the matrix: {(driver, lap): (position, gap)}.
+    start = laps.loc[laps['LapNumber'] == 1, 'LapStartTime'].min()
+    result = {}
+    for lap in sorted(laps['LapNumber'].unique()):
+        lap_rows = laps[laps['LapNumber'] == lap]
+        times = {}
+        for driver in lap_rows['Driver'].unique():
+            row = lap_rows[lap_rows['Driver'] == driver].iloc[0]
+            times[driver] = (row['Time'] - start).total_seconds()
+        leader = min(times.values())
+        for position, driver in enumerate(sorted(times, key=times.get), start=1):
+            result[(driver, int(lap))] = (position, times[driver] - leader)
+    return result
+
+
+def main():
+    parser = argument_parser("Benchmark the race timeline matrix against a per-lap, per-driver loop.", repeat=10)
+    parser.add_argument("--drivers", type=int, default=20)
+    parser.add_argument("--laps", type=int, default=70)
+    args = parser.parse_args()
+
+    laps = synthetic_race_laps(args.drivers, args.laps)
+
+    legacy = legacy_timeline(laps)
+    timeline = build_timeline(laps)
+    for (driver, lap), (position, gap) in legacy.items():
+        row = timeline.drivers.index(driver)
+        assert timeline.positions[row, lap - 1] == position
+        assert abs(timeline.gaps[row, lap - 1] - gap) < 1e-6
+
+    compare(f"{args.drivers} drivers x {args.laps} laps, {len(laps)} laps timed",
+            lambda: legacy_timeline(laps), lambda: build_timeline(laps).summary(), "timeline matrix", args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import timeit
+
+import numpy as np
+
+
+# Shared by the bench_* scripts, which each check a batched implementation
+# against the per-driver loop it replaced on synthetic data and then time both.
+
+def argument_parser(description, repeat=20):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--repeat", type=int, default=repeat)
+    return parser
+
+
+def assert_frames_close(new, legacy, key, columns=None, atol=1e-6):
+    # Both results agree row by row once sorted by `key`, on `columns` or on
+    # every column of the legacy frame.
+    new = new.set_index(key).sort_index()
+    legacy = legacy.set_index(key).sort_index()
+    columns = list(legacy.columns) if columns is None else list(columns)
+    np.testing.assert_allclose(new[columns].to_numpy(), legacy[columns].to_numpy(), atol=atol)
+
+
+def best_time(func, repeat):
+    # Fastest of `repeat` single runs, the least noisy estimate on a busy machine.
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def compare(header, legacy, new, label, repeat):
+    # Times the legacy and new implementation and prints both with the speedup.
+    legacy_time = best_time(legacy, repeat)
+    new_time = best_time(new, repeat)
+    print(header)
+    print(f"{'legacy loop:':<17}{legacy_time * 1000:8.2f} ms")
+    print(f"{label + ':':<17}{new_time * 1000:8.2f} ms")
+    print(f"{'speedup:':<17}{legacy_time / new_time:8.1f}x")
+    return legacy_time, new_time
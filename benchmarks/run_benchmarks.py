@@ -0,0 +1,224 @@
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analyses
+import charts
+from data_source import ReplaySource
+from load_spec import load, laps_only, fastest_lap_car_data, lap_car_data
+from session_cache import SessionCache
+from session_summary import driver_summary
+from timeline import TimelineCache
+
+
+# Each analysis is split into the same three phases as the dashboard tabs:
+# load (session cache + LoadSpec), compute (analyses.*) and render (the
+# matplotlib figure drawn to PNG, which is what st.pyplot pays for). The
+# *_chart variants render the interactive charts instead, whose server-side
+# cost is serialising the chart data to Arrow as st.vega_lite_chart does.
+
+def _h2h_load(cache, year, event):
+    quali = load(laps_only('Q'), year, event, cache).session
+    drivers = tuple(quali.results['Abbreviation'].iloc[:2])
+    return load(fastest_lap_car_data('Q', drivers), year, event, cache), drivers
+
+
+ANALYSES = {
+    'qualifying_delta': (
+        lambda cache, year, event: load(laps_only('Q'), year, event, cache).session,
+        lambda quali: analyses.qualifying_delta(driver_summary(quali)),
+        lambda result: analyses.plot_qualifying_delta(*result, "Qualifying Delta"),
+    ),
+    'sector_times': (
+        lambda cache, year, event: load(laps_only('Q'), year, event, cache).session,
+        lambda quali: analyses.sector_times(driver_summary(quali)),
+        lambda result: analyses.plot_sector_times(result, "Sector Times"),
+    ),
+    'head_to_head': (
+        _h2h_load,
+        lambda loaded: analyses.head_to_head(*loaded),
+        lambda result: analyses.plot_head_to_head(*result, "Head-to-Head"),
+    ),
+    'head_to_head_chart': (
+        _h2h_load,
+        lambda loaded: analyses.head_to_head(*loaded),
+        lambda result: charts.chart_head_to_head(*result, "Head-to-Head"),
+    ),
+    'lap_distribution': (
+        lambda cache, year, event: load(laps_only('R'), year, event, cache).session,
+        analyses.lap_distribution,
+        lambda result: analyses.plot_lap_distribution(*result, "Lap Distribution"),
+    ),
+    'lap_distribution_chart': (
+        lambda cache, year, event: load(laps_only('R'), year, event, cache).session,
+        analyses.lap_distribution,
+        lambda result: charts.chart_lap_distribution(result[0], result[1], result[3], "Lap Distribution"),
+    ),
+    'race_pace': (
+        lambda cache, year, event: load(laps_only('R'), year, event, cache).session,
+        analyses.race_pace,
+        lambda result: analyses.plot_race_pace(*result, "Race Pace"),
+    ),
+    'race_timeline': (
+        lambda cache, year, event: load(laps_only('R'), year, event, cache).session,
+        # A new cache per call, so every run builds the matrix.
+        lambda race: analyses.race_timeline(race, TimelineCache()),
+        lambda result: analyses.plot_race_timeline(*result, "Race Timeline"),
+    ),
+    'acceleration': (
+        lambda cache, year, event: load(lap_car_data('R', 1), year, event, cache),
+        analyses.acceleration,
+        lambda result: analyses.plot_acceleration(result, "Acceleration Times"),
+    ),
+}
+
+
+def discover_events(root):
+    events = []
+    for year in sorted(os.listdir(root)):
+        if not year.isdigit():
+            continue
+        for event in sorted(os.listdir(os.path.join(root, year))):
+            sessions = os.listdir(os.path.join(root, year, event))
+            if 'race' in sessions and 'qualifying' in sessions:
+                events.append((int(year), event.replace('_', ' ')))
+    return events
+
+
+def _render_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getbuffer().nbytes
+
+
+def _render_chart(chart):
+    data, spec = chart
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size + len(json.dumps(spec))
+
+
+def _render_output(rendered):
+    if isinstance(rendered, tuple):
+        return _render_chart(rendered)
+    return _render_png(rendered)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_once(root, year, event, name, trace_memory):
+    load_step, compute_step, render_step = ANALYSES[name]
+    cache = SessionCache(source=ReplaySource(root))
+    gc.collect()
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        loaded, load_s = _timed(load_step, cache, year, event)
+        result, compute_s = _timed(compute_step, loaded)
+        fig, figure_s = _timed(render_step, result)
+        output_bytes, draw_s = _timed(_render_output, fig)
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return load_s, compute_s, figure_s + draw_s, output_bytes, peak
+
+
+def run(root, events, names, repeat):
+    results = []
+    for year, event in events:
+        for name in names:
+            timings = [run_once(root, year, event, name, trace_memory=False) for _ in range(repeat)]
+            # tracemalloc slows allocation-heavy code down, so memory gets its own pass
+            peak = run_once(root, year, event, name, trace_memory=True)[4]
+            results.append({
+                'year': year,
+                'event': event,
+                'analysis': name,
+                'load_s': min(t[0] for t in timings),
+                'compute_s': min(t[1] for t in timings),
+                'render_s': min(t[2] for t in timings),
+                'output_bytes': timings[0][3],
+                'peak_mb': round(peak / 2**20, 2),
+            })
+            row = results[-1]
+            print(f"{year} {event:<28} {name:<22} load {row['load_s']:7.3f}s  compute {row['compute_s']:7.3f}s  "
+                  f"render {row['render_s']:7.3f}s  peak {row['peak_mb']:8.1f} MB")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['year'], r['event'], r['analysis']): r for r in json.load(f)['results']}
+
+    print(f"\nChange against {baseline_path}:")
+    for row in results:
+        old = baseline.get((row['year'], row['event'], row['analysis']))
+        if old is None:
+            continue
+        changes = []
+        for field in ('load_s', 'compute_s', 'render_s', 'peak_mb'):
+            if old[field]:
+                changes.append(f"{field} {100 * (row[field] - old[field]) / old[field]:+6.1f}%")
+        print(f"{row['year']} {row['event']:<28} {row['analysis']:<22} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every dashboard analysis over recorded sessions.")
+    parser.add_argument("--fixtures", default="fixtures", help="Replay snapshot root (see replay.py)")
+    parser.add_argument("--analysis", action="append", choices=sorted(ANALYSES), help="Only run these analyses")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Print the change against an earlier JSON result file")
+    args = parser.parse_args()
+
+    events = discover_events(args.fixtures)
+    if not events:
+        parser.error(f"No recorded race + qualifying sessions found in {args.fixtures}")
+
+    results = run(args.fixtures, events, args.analysis or list(ANALYSES), args.repeat)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({
+                'commit': _git_commit(),
+                'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'repeat': args.repeat,
+                'results': results,
+            }, f, indent=1)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from alignment import decimate_minmax
+from tracing import traced
+
+
+# Interactive versions of the heavier plots. Each chart is a small long-form
+# DataFrame plus a Vega-Lite spec for st.vega_lite_chart: the browser lays out
+# and draws the points, and pan/zoom happen client-side without a rerun.
+
+H2H_CHANNELS = (('Delta', 'Delta (s)'), ('Speed', 'Speed (Km/h)'), ('Throttle', 'Throttle (%)'), ('Brake', 'Brake'))
+
+
+def beeswarm_offsets(groups, values, bin_width, spacing=0.06, max_offset=0.45):
+    # Approximates a swarm layout in one pass: values are binned per group and
+    # the points of a bin are spread alternately left and right of the centre
+    # in `spacing` steps, clipped to +-max_offset of the category width.
+    groups = np.asarray(groups)
+    values = np.asarray(values, dtype=np.float64)
+    bins = np.floor(values / bin_width).astype(np.int64)
+
+    order = np.lexsort((values, bins, groups))
+    sorted_groups, sorted_bins = groups[order], bins[order]
+    new_run = np.ones(len(order), dtype=bool)
+    new_run[1:] = (sorted_groups[1:] != sorted_groups[:-1]) | (sorted_bins[1:] != sorted_bins[:-1])
+    positions = np.arange(len(order))
+    rank = positions - np.maximum.accumulate(np.where(new_run, positions, 0))
+
+    side = np.where(rank % 2, 1, -1) * ((rank + 1) // 2)
+    offsets = np.empty(len(order))
+    offsets[order] = np.clip(side * spacing, -max_offset, max_offset)
+    return offsets
+
+
+def _color_scale(domain, palette):
+    return {'domain': list(domain), 'range': [palette.get(key, 'grey') for key in domain]}
+
+
+@traced('chart.lap_distribution')
+def chart_lap_distribution(driver_laps, finishing_order, compound_palette, title, bins=80):
+    laps = driver_laps.loc[driver_laps['LapTime(s)'].notna(), ['Driver', 'LapNumber', 'Compound', 'LapTime(s)']]
+    seconds = laps['LapTime(s)'].to_numpy()
+    bin_width = max(float(np.ptp(seconds)) / bins, 1e-3) if len(seconds) else 1.0
+
+    data = pd.DataFrame({
+        'Driver': laps['Driver'].to_numpy(),
+        'Lap': laps['LapNumber'].astype('float32').to_numpy(),
+        'Compound': laps['Compound'].fillna('UNKNOWN').to_numpy(),
+        'LapTime': seconds.astype(np.float32),
+        'Offset': beeswarm_offsets(laps['Driver'].to_numpy(), seconds, bin_width).astype(np.float32),
+    })
+
+    compounds = [compound for compound in compound_palette if compound in set(data['Compound'])]
+    spec = {
+        'title': title,
+        'height': 550,
+        'mark': {'type': 'circle', 'size': 28, 'opacity': 0.9},
+        'encoding': {
+            'x': {'field': 'Driver', 'type': 'nominal', 'sort': list(finishing_order), 'title': 'Driver'},
+            'xOffset': {'field': 'Offset', 'type': 'quantitative', 'scale': {'domain': [-0.5, 0.5]}},
+            'y': {'field': 'LapTime', 'type': 'quantitative', 'title': 'Lap Times (s)', 'scale': {'zero': False}},
+            'color': {'field': 'Compound', 'type': 'nominal', 'scale': _color_scale(compounds, compound_palette)},
+            'tooltip': [{'field': 'Driver'}, {'field': 'Lap'}, {'field': 'Compound'},
+                        {'field': 'LapTime', 'format': '.3f'}],
+        },
+        'params': [{'name': 'zoom', 'select': {'type': 'interval', 'encodings': ['y']}, 'bind': 'scales'}],
+    }
+    return data, spec
+
+
+@traced('chart.head_to_head')
+def chart_head_to_head(aligned, colors, title, buckets=1500):
+    # One row per decimated point and channel; every channel is min/max
+    # decimated on its own so each panel keeps its peaks.
+    frames = []
+    for channel, label in H2H_CHANNELS:
+        distance, values = decimate_minmax(aligned.distance, aligned[channel], buckets)
+        for i, drv in enumerate(aligned.drivers):
+            frames.append(pd.DataFrame({
+                'Distance': distance[i].astype(np.float32),
+                'Value': values[i].astype(np.float32),
+                'Driver': drv,
+                'Channel': label,
+            }))
+    data = pd.concat(frames, ignore_index=True)
+
+    spec = {
+        'title': title,
+        'facet': {'row': {'field': 'Channel', 'type': 'nominal', 'sort': [label for _, label in H2H_CHANNELS],
+                          'title': None}},
+        'spec': {
+            'width': 1100,
+            'height': 170,
+            'mark': {'type': 'line', 'strokeWidth': 1.5},
+            'encoding': {
+                'x': {'field': 'Distance', 'type': 'quantitative', 'title': 'Distance (m)'},
+                'y': {'field': 'Value', 'type': 'quantitative', 'title': None, 'scale': {'zero': False}},
+                'color': {'field': 'Driver', 'type': 'nominal', 'scale': _color_scale(aligned.drivers, colors)},
+            },
+            'params': [{'name': 'zoom', 'select': {'type': 'interval', 'encodings': ['x']}, 'bind': 'scales'}],
+        },
+        'resolve': {'scale': {'y': 'independent'}},
+    }
+    return data, spec
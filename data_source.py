@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+
+
+# Results can still change after a session (penalties, disqualifications);
+# data read before this long after the start is refreshed once it has passed.
+RESULTS_FINAL_AFTER = pd.Timedelta(hours=float(os.environ.get("F1_RESULTS_FINAL_HOURS", "24")))
+
+
+class LiveSource:
+
+    name = "live"
+
+    def __init__(self, cache_dir=None):
+        self._events = {}
+        # Shares FastF1's HTTP cache with batch_ingest.py when F1_CACHE_DIR is set.
+        cache_dir = cache_dir or os.environ.get("F1_CACHE_DIR")
+        if cache_dir:
+            import fastf1 as ff1
+
+            os.makedirs(cache_dir, exist_ok=True)
+            ff1.Cache.enable_cache(cache_dir)
+
+    def get_session(self, year, event, session_type):
+        import fastf1 as ff1
+
+        return ff1.get_session(year, event, session_type)
+
+    def event_info(self, year, event, session_type):
+        # (round number, event name, time the source data last changed) of
+        # the event FastF1 resolves `event` to, as get_session() does.
+        key = (int(year), str(event).strip().lower())
+        resolved = self._events.get(key)
+        if resolved is None:
+            import fastf1 as ff1
+
+            resolved = self._events[key] = ff1.get_event(year, event)
+
+        try:
+            started = pd.Timestamp(resolved.get_session_date(session_type, utc=True))
+        except ValueError:
+            started = None
+        if started is not None:
+            started = started.tz_localize('UTC') if started.tzinfo is None else started.tz_convert('UTC')
+            if pd.Timestamp.now(tz='UTC') >= started + RESULTS_FINAL_AFTER:
+                started += RESULTS_FINAL_AFTER
+        return int(resolved['RoundNumber']), resolved['EventName'], started
+
+    def events(self, year):
+        # (round number, event name) of every event of the season that has taken place
+        import fastf1 as ff1
+
+        schedule = ff1.get_event_schedule(year, include_testing=False)
+        schedule = schedule[schedule['EventDate'] <= pd.Timestamp.now(tz='UTC').tz_localize(None)]
+        return list(zip(schedule['RoundNumber'].astype(int), schedule['EventName']))
+
+
+class ReplaySource:
+    # Serves sessions recorded with `python replay.py` from a local snapshot
+    # directory, without touching the network.
+
+    name = "replay"
+
+    def __init__(self, root):
+        self.root = root
+
+    def get_session(self, year, event, session_type):
+        from replay import ReplaySession, find_session
+
+        return ReplaySession(find_session(self.root, year, event, session_type))
+
+    def event_info(self, year, event, session_type):
+        from replay import find_session, session_event
+
+        return session_event(find_session(self.root, year, event, session_type))
+
+    def events(self, year):
+        from replay import recorded_events
+
+        return recorded_events(self.root, year)
+
+
+def source_from_spec(spec):
+    # "live" or "replay:<snapshot directory>"
+    kind, _, location = spec.partition(':')
+    if kind == 'live':
+        return LiveSource()
+    if kind == 'replay':
+        return ReplaySource(location or 'fixtures')
+    raise ValueError(f"Unknown data source '{spec}', expected 'live' or 'replay:<directory>'.")
+
+
+def get_source():
+    return source_from_spec(os.environ.get("F1_DATA_SOURCE", "live"))
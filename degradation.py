@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+# Seconds a lap gets slower per lap of fuel still on board (about 1.6 kg of
+# fuel per lap at roughly 0.035 s per kg).
+FUEL_EFFECT = 0.055
+
+MIN_STINT_LAPS = 5
+
+# Tyre age at which stints are compared, so a driver who ran long on old
+# tyres is not ranked behind one who ran short stints on new ones.
+REFERENCE_TYRE_AGE = 10
+
+
+def fuel_corrected(lap_seconds, lap_numbers, total_laps, fuel_effect=FUEL_EFFECT):
+    # Lap times as if every lap had been driven with the fuel load of the
+    # last lap, so the trend left within a stint is tyre wear.
+    return lap_seconds - fuel_effect * (total_laps - lap_numbers)
+
+
+def stint_fits(laps, total_laps, fuel_effect=FUEL_EFFECT, min_laps=MIN_STINT_LAPS):
+    # laps has one row per representative lap with 'Driver', 'Stint',
+    # 'Compound', 'TyreLife', 'LapNumber' and 'LapTime'. Every stint gets a
+    # least-squares line of fuel-corrected lap time against tyre age, all
+    # stints at once from grouped sums:
+    #   slope = (n*Sxy - Sx*Sy) / (n*Sxx - Sx^2), intercept = (Sy - slope*Sx) / n
+    laps = laps.dropna(subset=['LapTime', 'TyreLife', 'Stint'])
+    laps = laps.assign(Stint=laps['Stint'].astype(np.int64))
+    x = laps['TyreLife'].to_numpy(dtype=np.float64)
+    y = fuel_corrected(laps['LapTime'].dt.total_seconds().to_numpy(),
+                       laps['LapNumber'].to_numpy(dtype=np.float64), total_laps, fuel_effect)
+
+    terms = pd.DataFrame({
+        'Driver': laps['Driver'].to_numpy(),
+        'Stint': laps['Stint'].to_numpy(),
+        'x': x, 'y': y, 'xx': x * x, 'xy': x * y, 'n': 1,
+    })
+    sums = terms.groupby(['Driver', 'Stint']).sum()
+    sums = sums[sums['n'] >= min_laps]
+
+    n, sx, sy = sums['n'], sums['x'], sums['y']
+    spread = n * sums['xx'] - sx * sx
+    slope = (n * sums['xy'] - sx * sy) / spread.where(spread > 0)
+
+    stints = laps.groupby(['Driver', 'Stint']).agg(
+        Team=('Team', 'first'),
+        Compound=('Compound', 'first'),
+        FirstLap=('LapNumber', 'min'),
+        LastLap=('LapNumber', 'max'),
+    ).loc[sums.index]
+    stints['Laps'] = n
+    stints['Degradation'] = slope
+    stints['Intercept'] = (sy - slope.fillna(0) * sx) / n
+    stints['MeanTime'] = sy / n
+    return stints.reset_index()
+
+
+def driver_pace(stints, reference_age=REFERENCE_TYRE_AGE):
+    # Fuel-corrected race pace per driver: the lap-weighted mean of the
+    # stints' fitted lap time at `reference_age` laps of tyre age, with the
+    # lap-weighted degradation. Stints without a fit (all laps at one tyre
+    # age) are left out of both sums and the lap count.
+    fitted = stints.dropna(subset=['Degradation'])
+    weighted = fitted.assign(
+        PaceLaps=(fitted['Intercept'] + fitted['Degradation'] * reference_age) * fitted['Laps'],
+        DegLaps=fitted['Degradation'] * fitted['Laps'],
+    ).groupby('Driver').agg(
+        Team=('Team', 'first'),
+        Laps=('Laps', 'sum'),
+        Stints=('Stint', 'count'),
+        PaceLaps=('PaceLaps', 'sum'),
+        DegLaps=('DegLaps', 'sum'),
+    )
+    pace = pd.DataFrame({
+        'Team': weighted['Team'],
+        'Pace': weighted['PaceLaps'] / weighted['Laps'],
+        'Degradation': weighted['DegLaps'] / weighted['Laps'],
+        'Laps': weighted['Laps'],
+        'Stints': weighted['Stints'],
+    })
+    pace = pace.sort_values('Pace').reset_index()
+    pace['Gap'] = pace['Pace'] - pace['Pace'].iloc[0] if len(pace) else pace['Pace']
+    return pace
@@ -0,0 +1,107 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from tracing import span
+
+
+DEFAULT_MAX_BYTES = int(os.environ.get("F1_FIGURE_CACHE_MB", "128")) * 1024 * 1024
+
+# Same output as st.pyplot, so cached images look like the figures they replace.
+SAVEFIG_OPTIONS = {'format': 'png', 'bbox_inches': 'tight', 'dpi': 200}
+
+
+def figure_png(fig):
+    # Rasterises a figure once. The analyses build figures outside pyplot, so
+    # there is no figure manager to close and the figure is freed with `fig`.
+    buffer = io.BytesIO()
+    with span('render'):
+        fig.savefig(buffer, **SAVEFIG_OPTIONS)
+    return buffer.getvalue()
+
+
+def figure_key(analysis, year, round_number, updated_at, *params):
+    # Images are keyed by the round the data source resolved the event to, so
+    # every spelling of a race shares one image, and by the time the source
+    # data last changed, so an image drawn before the results were final is
+    # drawn again once they are.
+    return (analysis, int(year), int(round_number), updated_at, params)
+
+
+class FigureCache:
+    # Rendered PNG bytes keyed by figure_key(), shared by every browser session
+    # and bounded by the total size of the images.
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            png = self._images.get(key)
+            if png is None:
+                self.misses += 1
+            else:
+                self._images.move_to_end(key)
+                self.hits += 1
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._images[key] = png
+            self._bytes += len(png)
+            while self._bytes > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def render(self, key, build):
+        # `build` loads the data and returns a Figure, or None when there is
+        # nothing to plot; it only runs when the image is not cached yet.
+        with span('cache.figure') as record:
+            png = self.get(key)
+            record['hit'] = png is not None
+        if png is None:
+            fig = build()
+            if fig is None:
+                return None
+            png = figure_png(fig)
+            self.put(key, png)
+        return png
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._images),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_figure_cache():
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = FigureCache()
+        return _shared_cache
@@ -0,0 +1,131 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+from session_cache import get_cache
+from telemetry_store import get_telemetry_store
+from tracing import span
+
+
+CHANNELS = ('car', 'pos')
+
+
+@dataclass(frozen=True)
+class LoadSpec:
+    # What an analysis reads from a session. Laps and results are always
+    # loaded; telemetry is only loaded when channels are requested, and only
+    # the laps selected by `laps` for `drivers` (None means every driver) are
+    # sliced out of it. `laps` is either 'fastest' or a lap number.
+    session_type: str
+    channels: tuple = ()
+    drivers: tuple = None
+    laps: object = None
+
+    def __post_init__(self):
+        unknown = set(self.channels) - set(CHANNELS)
+        if unknown:
+            raise ValueError(f"Unknown telemetry channels: {sorted(unknown)}")
+        if self.channels and self.laps is None:
+            raise ValueError("Telemetry channels need a lap selection ('fastest' or a lap number).")
+
+    @property
+    def telemetry(self):
+        return bool(self.channels)
+
+
+def laps_only(session_type):
+    return LoadSpec(session_type)
+
+
+def fastest_lap_car_data(session_type, drivers):
+    return LoadSpec(session_type, channels=('car',), drivers=tuple(drivers), laps='fastest')
+
+
+def lap_car_data(session_type, lap_number, drivers=None):
+    return LoadSpec(session_type, channels=('car',), drivers=tuple(drivers) if drivers else None, laps=lap_number)
+
+
+class LoadedData:
+
+    def __init__(self, session, laps, telemetry):
+        self.session = session
+        self.laps = laps
+        self.telemetry = telemetry
+
+
+def _select_laps(driver_laps, selection):
+    if selection == 'fastest':
+        return driver_laps.pick_fastest()
+    return driver_laps.pick_laps(selection)
+
+
+def _slice_telemetry(laps, channels):
+    if 'car' in channels and 'pos' in channels:
+        return laps.get_telemetry()
+    if 'car' in channels:
+        return laps.get_car_data()
+    return laps.get_pos_data()
+
+
+def _lap_value(laps, column):
+    # pick_fastest() returns a single Lap (a Series), pick_laps() a Laps frame
+    if isinstance(laps, pd.Series):
+        return laps[column]
+    return laps[column].iloc[0]
+
+
+def load(spec, year, event, cache=None, store=None):
+    # Car data comes from the telemetry store when the session is there, so
+    # only the laps are loaded and no telemetry DataFrames are built. The
+    # store is opened by the round the data source resolves `event` to.
+    cache = cache or get_cache()
+    store = store or get_telemetry_store()
+    stored = None
+    if spec.channels == ('car',):
+        round_number, _, _ = cache.source.event_info(year, event, spec.session_type)
+        stored = store.open(year, round_number, spec.session_type)
+    session = cache.get(year, event, spec.session_type, telemetry=spec.telemetry and stored is None)
+    with span('load.select', session=spec.session_type, stored=stored is not None):
+        return select(spec, session, stored,
+                      upgrade=lambda: cache.get(year, event, spec.session_type, telemetry=True))
+
+
+def select(spec, session, stored=None, upgrade=None):
+    # Slices what `spec` asks for out of an already loaded session, taking
+    # the car data of the selected laps from `stored` when given. A lap the
+    # store does not have is sliced from the session's own telemetry, which
+    # `upgrade()` loads into the session. Laps that never ended (a retirement
+    # on the lap) are not stored and have no telemetry to slice, so their
+    # drivers are skipped.
+    selected_laps = {}
+    telemetry = {}
+    if spec.laps is None:
+        return LoadedData(session, selected_laps, telemetry)
+
+    drivers = spec.drivers if spec.drivers is not None else pd.unique(session.laps['Driver'])
+    for drv in drivers:
+        driver_laps = session.laps.pick_drivers(drv)
+        if driver_laps.empty:
+            continue
+        laps = _select_laps(driver_laps, spec.laps)
+        if laps is None or laps.empty:
+            continue
+
+        abbreviation = driver_laps['Driver'].iloc[0]
+        if stored is not None:
+            lap = stored.lap(abbreviation, _lap_value(laps, 'LapNumber'))
+            if lap is None:
+                if pd.isna(_lap_value(laps, 'Time')):
+                    continue
+                if upgrade is None:
+                    raise ValueError(f"The telemetry store has no car data for {abbreviation} lap "
+                                     f"{_lap_value(laps, 'LapNumber')} of {session.event['EventName']} "
+                                     f"{session.name}.")
+                upgrade()
+                lap = _slice_telemetry(laps, spec.channels)
+            telemetry[abbreviation] = lap
+        elif spec.telemetry:
+            telemetry[abbreviation] = _slice_telemetry(laps, spec.channels)
+        selected_laps[abbreviation] = laps
+
+    return LoadedData(session, selected_laps, telemetry)
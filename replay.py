@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import fastf1 as ff1
+from fastf1.core import Laps, Session, SessionResults, Telemetry
+from fastf1.events import Event
+
+
+# Snapshot layout: <root>/<year>/<event slug>/<session slug>/ with one Parquet
+# file per table and meta.json for the event, session info and scalars.
+SESSION_NAMES = {
+    'R': 'Race',
+    'Q': 'Qualifying',
+    'S': 'Sprint',
+    'SQ': 'Sprint Qualifying',
+    'SS': 'Sprint Shootout',
+    'FP1': 'Practice 1',
+    'FP2': 'Practice 2',
+    'FP3': 'Practice 3',
+}
+
+_TABLES = {
+    'laps': ('_session_status', '_track_status', '_laps'),
+    'telemetry': ('_car_data', '_pos_data'),
+    'weather': ('_weather_data',),
+    'messages': ('_race_control_messages',),
+}
+
+_SCALARS = ('_total_laps', '_t0_date', '_session_start_time', '_session_split_times')
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_')
+
+
+def _encode(value):
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return {'timestamp': value.isoformat()}
+    if isinstance(value, pd.Timedelta):
+        return {'timedelta': int(value.value)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if set(value) == {'timestamp'}:
+            return pd.Timestamp(value['timestamp'])
+        if set(value) == {'timedelta'}:
+            return pd.Timedelta(value['timedelta'])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def session_dir(root, year, event_name, session_name):
+    return os.path.join(root, str(year), slugify(event_name), slugify(session_name))
+
+
+def _write_frame(df, path):
+    pd.DataFrame(df).reset_index(drop=True).to_parquet(path, compression='zstd', index=False)
+
+
+def _write_telemetry(data, path):
+    frames = [pd.DataFrame(tel).assign(DriverNumber=drv) for drv, tel in data.items()]
+    if frames:
+        _write_frame(pd.concat(frames, ignore_index=True), path)
+
+
+def record_session(session, root):
+    # Writes whatever parts of an already loaded session are present.
+    path = session_dir(root, session.event.year, session.event['EventName'], session.name)
+    os.makedirs(path, exist_ok=True)
+
+    parts = []
+    _write_frame(session.results, os.path.join(path, 'results.parquet'))
+    for part, attrs in _TABLES.items():
+        if not all(hasattr(session, attr) for attr in attrs):
+            continue
+        for attr in attrs:
+            target = os.path.join(path, f"{attr.lstrip('_')}.parquet")
+            value = getattr(session, attr)
+            if attr in ('_car_data', '_pos_data'):
+                _write_telemetry(value, target)
+            elif isinstance(value, pd.DataFrame):
+                _write_frame(value, target)
+        parts.append(part)
+
+    meta = {
+        'year': session.event.year,
+        'event': _encode(session.event.to_dict()),
+        'session_name': session.name,
+        'session_info': _encode(getattr(session, '_session_info', None)),
+        'parts': parts,
+        'scalars': {attr: _encode(getattr(session, attr)) for attr in _SCALARS if hasattr(session, attr)},
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+    return path
+
+
+def _read_meta(path):
+    with open(os.path.join(path, 'meta.json')) as f:
+        return json.load(f)
+
+
+class ReplaySession(Session):
+    # A FastF1 Session whose load steps read a recorded snapshot instead of
+    # the live timing API, so Laps/Telemetry behave exactly as after load().
+
+    def __init__(self, path):
+        meta = _read_meta(path)
+        event = Event(pd.Series(_decode(meta['event'])), year=meta['year'])
+        super().__init__(event, meta['session_name'], f1_api_support=True)
+        self.path = path
+        self._parts = set(meta['parts'])
+        self._meta = meta
+
+    def _read(self, name):
+        return pd.read_parquet(os.path.join(self.path, f"{name}.parquet"))
+
+    def _require(self, part):
+        if part not in self._parts:
+            raise ValueError(f"The snapshot at {self.path} does not contain {part} data.")
+
+    def load(self, *, laps=True, telemetry=True, weather=True, messages=True, livedata=None):
+        self._session_info = _decode(self._meta['session_info'])
+        self._results = SessionResults(self._read('results'))
+        for attr, value in self._meta['scalars'].items():
+            setattr(self, attr, _decode(value))
+
+        # Like FastF1, parts the snapshot does not have are skipped instead of
+        # failing the whole load; asking for them directly still raises.
+        steps = (
+            ('laps', laps, self._load_laps_data),
+            ('telemetry', telemetry, self._load_telemetry),
+            ('weather', weather, self._load_weather_data),
+            ('messages', messages, self._load_race_control_messages),
+        )
+        for part, wanted, step in steps:
+            if wanted and part in self._parts:
+                step()
+
+    def _recorded_colors(self, key):
+        # fastf1.plotting looks colours up in the live timing driver list,
+        # which a replayed session does not have, so the analyses use the
+        # team colours of the recorded results instead.
+        results = self._results.dropna(subset=[key, 'TeamColor'])
+        return {name: f"#{color.lstrip('#')}" for name, color in zip(results[key], results['TeamColor']) if color}
+
+    def recorded_team_colors(self):
+        return self._recorded_colors('TeamName')
+
+    def recorded_driver_colors(self):
+        return self._recorded_colors('Abbreviation')
+
+    def _load_laps_data(self, livedata=None):
+        self._require('laps')
+        self._session_status = self._read('session_status')
+        self._track_status = self._read('track_status')
+        self._laps = Laps(self._read('laps'), session=self)
+
+    def _read_telemetry(self, name):
+        path = os.path.join(self.path, f"{name}.parquet")
+        if not os.path.exists(path):
+            return {}
+        data = pd.read_parquet(path)
+        return {
+            drv: Telemetry(frame.drop(columns='DriverNumber').reset_index(drop=True), session=self, driver=drv)
+            for drv, frame in data.groupby('DriverNumber', sort=False)
+        }
+
+    def _load_telemetry(self, livedata=None):
+        self._require('telemetry')
+        self._car_data = self._read_telemetry('car_data')
+        self._pos_data = self._read_telemetry('pos_data')
+
+    def _load_weather_data(self, livedata=None):
+        self._require('weather')
+        self._weather_data = self._read('weather_data')
+
+    def _load_race_control_messages(self, livedata=None):
+        self._require('messages')
+        self._race_control_messages = self._read('race_control_messages')
+
+
+def find_session(root, year, event, session_type):
+    session_name = SESSION_NAMES.get(str(session_type).upper(), session_type)
+    year_dir = os.path.join(root, str(year))
+    wanted = str(event).strip().lower()
+    # A round number only matches the round, never digits inside a name
+    # ("2" in "FORMULA 1 ... 2024").
+    by_round = wanted.isdigit()
+
+    for event_slug in sorted(os.listdir(year_dir)) if os.path.isdir(year_dir) else []:
+        path = os.path.join(year_dir, event_slug, slugify(session_name))
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            continue
+        info = _read_meta(path)['event']
+        if by_round:
+            if int(wanted) == int(info.get('RoundNumber')):
+                return path
+            continue
+        names = [info.get(key) for key in ('EventName', 'OfficialEventName', 'Country', 'Location')]
+        if any(name and wanted in str(name).lower() for name in names):
+            return path
+
+    raise ValueError(f"No recorded {session_name} session for '{event}' {year} in {root}")
+
+
+def session_event(path):
+    # (round number, event name, time the snapshot was recorded) of a
+    # recorded session.
+    info = _read_meta(path)['event']
+    recorded = pd.Timestamp(os.path.getmtime(os.path.join(path, 'meta.json')), unit='s', tz='UTC')
+    return int(info['RoundNumber']), info['EventName'], recorded
+
+
+def recorded_events(root, year):
+    events = {}
+    year_dir = os.path.join(root, str(year))
+    for event_slug in os.listdir(year_dir) if os.path.isdir(year_dir) else []:
+        for session_slug in os.listdir(os.path.join(year_dir, event_slug)):
+            path = os.path.join(year_dir, event_slug, session_slug)
+            if os.path.exists(os.path.join(path, 'meta.json')):
+                info = _read_meta(path)['event']
+                events[int(info['RoundNumber'])] = info['EventName']
+                break
+    return sorted(events.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record F1 sessions into a local replay snapshot.")
+    parser.add_argument("year", type=int)
+    parser.add_argument("event")
+    parser.add_argument("sessions", nargs="+", help="Session identifiers, e.g. R Q S")
+    parser.add_argument("--out", default="fixtures", help="Snapshot root directory")
+    args = parser.parse_args()
+
+    for session_type in args.sessions:
+        session = ff1.get_session(args.year, args.event, session_type)
+        session.load()
+        print(record_session(session, args.out))
+
+
+if __name__ == "__main__":
+    main()
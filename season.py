@@ -0,0 +1,170 @@
+import gc
+from collections import defaultdict
+
+import pandas as pd
+
+import analyses
+from data_source import get_source
+from load_spec import lap_car_data, select
+from summary_store import get_store, ingest
+from telemetry_store import get_telemetry_store
+from timeline import get_timeline_cache
+from tracing import span
+
+
+# Season views are folded together one session at a time: each round's
+# sessions are loaded, reduced to the per-session metrics the tabs already
+# compute and dropped again, so peak memory stays at about one session no
+# matter how many rounds the season has.
+
+def team_race_pace(race):
+    # Median lap time per team over representative green-flag laps.
+    laps = race.laps.pick_quicklaps().pick_wo_box()
+    return laps.groupby('Team')['LapTime'].median().dt.total_seconds()
+
+
+class SeasonAggregates:
+
+    def __init__(self):
+        self.rounds = {}
+        self.skipped = {}
+        self.launches_skipped = {}
+        self.team_colors = {}
+        self._quali_gaps = defaultdict(dict)
+        self._pace_sum = defaultdict(float)
+        self._pace_rounds = defaultdict(int)
+        self._launch_sum = defaultdict(lambda: [0.0, 0.0])
+        self._launch_starts = defaultdict(int)
+        self._racecraft = defaultdict(lambda: defaultdict(float))
+
+    def add_qualifying(self, round_number, summary):
+        team_best = summary.dropna(subset=['LapTime']).groupby('Team')['LapTime'].min()
+        gaps = (team_best - team_best.min()) / team_best.min() * 100
+        for team, gap in gaps.items():
+            self._quali_gaps[team][round_number] = gap
+
+        teams = summary.dropna(subset=['Team', 'TeamColor']).drop_duplicates('Team')
+        self.team_colors.update(zip(teams['Team'], teams['TeamColor']))
+
+    def add_race_pace(self, pace):
+        for team, delta in (pace - pace.min()).items():
+            self._pace_sum[team] += delta
+            self._pace_rounds[team] += 1
+
+    def add_launch(self, times_df):
+        for driver, first, second in zip(times_df['Driver'], times_df['0-100 Time'], times_df['100-200 Time']):
+            sums = self._launch_sum[driver]
+            sums[0] += first
+            sums[1] += second
+            self._launch_starts[driver] += 1
+
+    def add_timeline(self, timeline):
+        summary = timeline.summary()
+        for driver, gained, laps_led, in_drs in zip(summary['Driver'], summary['Gained'].fillna(0),
+                                                    summary['LapsLed'], summary['LapsInDRS']):
+            totals = self._racecraft[driver]
+            totals['Races'] += 1
+            totals['Positions Gained'] += gained
+            totals['Laps Led'] += laps_led
+            totals['Laps in DRS'] += in_drs
+
+    def quali_gap_trend(self):
+        # Rounds x teams, gap of each team's best lap to pole in percent.
+        trend = pd.DataFrame(self._quali_gaps).sort_index()
+        trend.index.name = 'Round'
+        return trend
+
+    def race_pace(self):
+        pace = pd.DataFrame({
+            'Team': list(self._pace_sum),
+            'PaceDelta': [self._pace_sum[team] / self._pace_rounds[team] for team in self._pace_sum],
+            'Rounds': [self._pace_rounds[team] for team in self._pace_sum],
+        })
+        return pace.sort_values('PaceDelta').reset_index(drop=True)
+
+    def launch_ranking(self):
+        drivers = list(self._launch_sum)
+        starts = [self._launch_starts[drv] for drv in drivers]
+        ranking = pd.DataFrame({
+            'Driver': drivers,
+            '0-100 Time': [self._launch_sum[drv][0] / n for drv, n in zip(drivers, starts)],
+            '100-200 Time': [self._launch_sum[drv][1] / n for drv, n in zip(drivers, starts)],
+            'Starts': starts,
+        })
+        ranking['Total Time'] = (ranking['0-100 Time'] + ranking['100-200 Time']).round(2)
+        ranking['0-100 Time'] = ranking['0-100 Time'].round(2)
+        ranking['100-200 Time'] = ranking['100-200 Time'].round(2)
+        return ranking.sort_values('Total Time').reset_index(drop=True)
+
+    def racecraft(self):
+        # Positions gained from the grid, laps led and laps within DRS range
+        # of the car ahead, summed over the season's races.
+        drivers = list(self._racecraft)
+        columns = ('Races', 'Positions Gained', 'Laps Led', 'Laps in DRS')
+        racecraft = pd.DataFrame({'Driver': drivers}, columns=['Driver', *columns])
+        for column in columns:
+            racecraft[column] = [int(self._racecraft[drv][column]) for drv in drivers]
+        racecraft['Gained per Race'] = (racecraft['Positions Gained'] / racecraft['Races']).round(2)
+        return racecraft.sort_values('Positions Gained', ascending=False).reset_index(drop=True)
+
+
+def _load_session(source, year, round_number, session_type, telemetry=False):
+    with span('fetch', session=session_type, round=round_number):
+        session = source.get_session(year, round_number, session_type)
+    with span('load.session', session=session_type, round=round_number):
+        session.load(laps=True, telemetry=telemetry, weather=False, messages=False)
+    return session
+
+
+def stream_season(year, source=None, store=None, launch=True, on_round=None, telemetry_store=None, timelines=None):
+    # Sessions come straight from the data source instead of the shared
+    # session cache, which would keep every round in memory.
+    source = source or get_source()
+    store = store or get_store()
+    telemetry_store = telemetry_store or get_telemetry_store()
+    timelines = timelines or get_timeline_cache()
+    aggregates = SeasonAggregates()
+
+    events = source.events(year)
+    for position, (round_number, event_name) in enumerate(events, start=1):
+        try:
+            # Looked up by round number only, so a round never reuses the
+            # summary of another round whose name contains its digits.
+            _, _, updated_at = source.event_info(year, round_number, 'Q')
+            summary = store.get(year, int(round_number), 'Q', updated_after=updated_at)
+            if summary is None:
+                quali = _load_session(source, year, round_number, 'Q')
+                summary = ingest(quali, 'Q', store)
+                del quali
+
+            stored = telemetry_store.open(year, round_number, 'R') if launch else None
+            race = _load_session(source, year, round_number, 'R', telemetry=launch and stored is None)
+            pace = team_race_pace(race)
+            timeline = timelines.get(race)
+            times_df = None
+            if launch:
+                # The launch is optional: a round whose lap 1 car data cannot
+                # be read keeps its other metrics and only loses its starts.
+                try:
+                    times_df = analyses.acceleration(select(lap_car_data('R', 1), race, stored))
+                except Exception as e:
+                    aggregates.launches_skipped[round_number] = f"{event_name}: {e}"
+            del race
+
+            # Folded in only once every step of the round has succeeded, so a
+            # skipped round leaves no partial totals behind.
+            aggregates.add_qualifying(round_number, summary)
+            aggregates.add_race_pace(pace)
+            aggregates.add_timeline(timeline)
+            if times_df is not None:
+                aggregates.add_launch(times_df)
+            aggregates.rounds[round_number] = event_name
+        except Exception as e:
+            aggregates.skipped[round_number] = f"{event_name}: {e}"
+        finally:
+            gc.collect()
+
+        if on_round is not None:
+            on_round(position, len(events), event_name)
+
+    return aggregates
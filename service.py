@@ -0,0 +1,427 @@
+import argparse
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import analyses
+import charts
+from background_loader import DEFAULT_SESSION_TYPES, STAGES, LoadJob, get_loader
+from figure_cache import get_figure_cache, figure_key
+from load_spec import load, laps_only, fastest_lap_car_data, lap_car_data
+from session_cache import get_cache
+from summary_store import get_store, ingest
+from timeline import get_timeline_cache
+from tracing import get_tracer
+
+
+# The dashboard's analyses behind one object, so the tabs run the same code
+# in-process or against a shared service process (F1_SERVICE_URL). The
+# service loads every event once however many browser sessions ask for it:
+# identical requests that arrive while one is running wait for its result.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.interrupted = False
+
+
+class SingleFlight:
+    # Runs one call per key at a time; concurrent callers with the same key
+    # share the result (or the exception) of the call already in flight.
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.interrupted:
+                return self.do(key, func)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            # The leader's own script was stopped or rerun by Streamlit. That
+            # is not an error of the call, so its followers run it themselves.
+            call.interrupted = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+def _no_wait(spec):
+    pass
+
+
+# Figure builders: (service, year, event, *params, wait) -> Figure or None.
+# `wait(spec)` runs before each load so a caller can wait for a background
+# load of exactly what the spec reads.
+
+def _qualifying_delta(service, year, event, wait):
+    summary = service.qualifying_summary(year, event, wait)
+    fastest_laps, pole_lap = analyses.qualifying_delta(summary)
+    if pole_lap is None:
+        return None
+    return analyses.plot_qualifying_delta(
+        fastest_laps, pole_lap, f"{summary.attrs['event_name']} {summary.attrs['year']}")
+
+
+def _sector_times(service, year, event, wait):
+    summary = service.qualifying_summary(year, event, wait)
+    return analyses.plot_sector_times(
+        analyses.sector_times(summary),
+        f"{summary.attrs['event_name']} {summary.attrs['year']} {summary.attrs['session_name']} - Personal Best Sector Times")
+
+
+def _head_to_head_data(service, year, event, driver1, driver2, resolution, wait):
+    spec = fastest_lap_car_data('Q', (driver1, driver2))
+    wait(spec)
+    h2h_data = load(spec, year, event, service.sessions)
+    title = f"{driver1} vs {driver2} ({year} {event} Telemetry Analysis)"
+    return analyses.head_to_head(h2h_data, (driver1, driver2), resolution), title
+
+
+def _head_to_head(service, year, event, driver1, driver2, resolution, wait):
+    (aligned, colors), title = _head_to_head_data(service, year, event, driver1, driver2, resolution, wait)
+    return analyses.plot_head_to_head(aligned, colors, title)
+
+
+def _lap_distribution_data(service, year, event, top, wait):
+    wait(laps_only('R'))
+    race = load(laps_only('R'), year, event, service.sessions).session
+    title = f"{race.event['EventName']} {race.event.year} Race Lap Time Distributions"
+    return analyses.lap_distribution(race, top), title
+
+
+def _lap_distribution(service, year, event, top, wait):
+    result, title = _lap_distribution_data(service, year, event, top, wait)
+    return analyses.plot_lap_distribution(*result, title)
+
+
+def _acceleration(service, year, event, wait):
+    spec = lap_car_data('R', 1)
+    wait(spec)
+    times_df = analyses.acceleration(load(spec, year, event, service.sessions))
+    return analyses.plot_acceleration(times_df, f"Acceleration Times ({year} {event} Grand Prix - Race)")
+
+
+def _race_pace(service, year, event, wait):
+    wait(laps_only('R'))
+    race = load(laps_only('R'), year, event, service.sessions).session
+    return analyses.plot_race_pace(
+        *analyses.race_pace(race), f"{race.event['EventName']} {race.event.year} Race Pace and Tyre Degradation")
+
+
+def _race_timeline(service, year, event, wait):
+    wait(laps_only('R'))
+    race = load(laps_only('R'), year, event, service.sessions).session
+    return analyses.plot_race_timeline(
+        *analyses.race_timeline(race, service.timelines),
+        f"{race.event['EventName']} {race.event.year} Race Timeline")
+
+
+# The LoadSpecs each analysis reads, by its parameters. A client of the
+# service process waits for their background load before asking for the
+# figure, so the dashboard shows the same progress as in-process.
+READS = {
+    'qualifying_delta': lambda: [laps_only('Q')],
+    'sector_times': lambda: [laps_only('Q')],
+    'head_to_head': lambda driver1, driver2, resolution: [fastest_lap_car_data('Q', (driver1, driver2))],
+    'lap_distribution': lambda top: [laps_only('R')],
+    'acceleration': lambda: [lap_car_data('R', 1)],
+    'race_pace': lambda: [laps_only('R')],
+    'race_timeline': lambda: [laps_only('R')],
+}
+
+
+FIGURES = {
+    'qualifying_delta': _qualifying_delta,
+    'sector_times': _sector_times,
+    'head_to_head': _head_to_head,
+    'lap_distribution': _lap_distribution,
+    'acceleration': _acceleration,
+    'race_pace': _race_pace,
+    'race_timeline': _race_timeline,
+}
+
+
+def _head_to_head_chart(service, year, event, driver1, driver2, resolution, wait):
+    (aligned, colors), title = _head_to_head_data(service, year, event, driver1, driver2, resolution, wait)
+    return charts.chart_head_to_head(aligned, colors, title)
+
+
+def _lap_distribution_chart(service, year, event, top, wait):
+    (driver_laps, finishing_order, _, compound_palette), title = _lap_distribution_data(
+        service, year, event, top, wait)
+    return charts.chart_lap_distribution(driver_laps, finishing_order, compound_palette, title)
+
+
+CHARTS = {
+    'head_to_head': _head_to_head_chart,
+    'lap_distribution': _lap_distribution_chart,
+}
+
+
+class AnalysisService:
+
+    def __init__(self, sessions=None, summaries=None, figures=None, timelines=None):
+        self.sessions = sessions or get_cache()
+        self.summaries = summaries or get_store()
+        self.figures = figures or get_figure_cache()
+        self.timelines = timelines or get_timeline_cache()
+        self._flights = SingleFlight()
+
+    def qualifying_summary(self, year, event, wait=_no_wait):
+        # The data source resolves the sidebar text to the event the other
+        # tabs load; the stored row is used unless the source has changed
+        # since it was written.
+        round_number, _, updated_at = self.sessions.source.event_info(year, event, 'Q')
+        summary = self.summaries.get(year, round_number, 'Q', updated_after=updated_at)
+        if summary is None:
+            wait(laps_only('Q'))
+            quali = load(laps_only('Q'), year, event, self.sessions).session
+            summary = ingest(quali, 'Q', self.summaries)
+        return summary
+
+    def figure(self, analysis, year, event, *params, wait=_no_wait):
+        # PNG bytes of a figure, or None when there is nothing to plot.
+        session_types = sorted({spec.session_type for spec in READS[analysis](*params)})
+        resolved = [self.sessions.source.event_info(year, event, session_type) for session_type in session_types]
+        updated_at = max((updated for _, _, updated in resolved if updated is not None), default=None)
+        key = figure_key(analysis, year, resolved[0][0], updated_at, *params)
+        build = FIGURES[analysis]
+        return self._flights.do(key, lambda: self.figures.render(
+            key, lambda: build(self, year, event, *params, wait)))
+
+    def chart(self, analysis, year, event, *params, wait=_no_wait):
+        # (data, Vega-Lite spec) of an interactive chart.
+        key = ('chart', analysis, int(year), str(event).strip().lower(), params)
+        build = CHARTS[analysis]
+        return self._flights.do(key, lambda: build(self, year, event, *params, wait))
+
+    def drivers(self, year, event):
+        def driver_list():
+            quali = load(laps_only('Q'), year, event, self.sessions).session
+            return pd.unique(quali.laps['Driver']).tolist()
+        return self._flights.do(('drivers', int(year), str(event).strip().lower()), driver_list)
+
+    def prefetch(self, year, event, session_types=DEFAULT_SESSION_TYPES, telemetry=False):
+        return get_loader().start(year, event, session_types, telemetry)
+
+    def job(self, year, event, session_type):
+        return get_loader().job(year, event, session_type)
+
+    def stats(self):
+        return {'sessions': self.sessions.stats(), 'figures': self.figures.stats(),
+                'timelines': self.timelines.stats(), 'shared_requests': self._flights.shared}
+
+
+def _chart_bytes(data, spec):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'vega_lite': json.dumps(spec).encode()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _read_chart(payload):
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(io.BytesIO(payload)).read_all()
+    spec = json.loads(table.schema.metadata[b'vega_lite'])
+    return table.to_pandas(), spec
+
+
+class RemoteJob(LoadJob):
+    # A background load job of the service process, as last reported at
+    # /job; wait() polls the service for its progress.
+
+    def __init__(self, client, year, event, state):
+        super().__init__(year, event, state['session_type'], state['telemetry'])
+        self._client = client
+        self._update(state)
+
+    def _update(self, state):
+        with self._changed:
+            self.stages = state['stages']
+            self.error = state['error']
+            self.finished = state['finished']
+
+    def wait(self, stages=STAGES, on_progress=None, interval=0.5):
+        while not self.ready(stages) and not self.finished:
+            if on_progress is not None:
+                on_progress(self)
+            time.sleep(interval)
+            state = self._client._job_state(self.year, self.event, self.session_type)
+            if state is None:
+                break
+            self._update(state)
+        return self.ready(stages)
+
+
+class ServiceClient:
+    # Same interface as AnalysisService, answered by a service process.
+
+    def __init__(self, url, timeout=900):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _get(self, path, **query):
+        url = f"{self.url}{path}?{urllib.parse.urlencode(query)}"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(e.read().decode(errors='replace') or str(e)) from None
+        except urllib.error.URLError as e:
+            raise RuntimeError(f"The analysis service at {self.url} is not reachable: {e.reason}") from None
+
+    def figure(self, analysis, year, event, *params, wait=_no_wait):
+        for spec in READS[analysis](*params):
+            wait(spec)
+        status, body = self._get(f"/figure/{analysis}", year=year, event=event, params=json.dumps(params))
+        return None if status == 204 else body
+
+    def chart(self, analysis, year, event, *params, wait=_no_wait):
+        for spec in READS[analysis](*params):
+            wait(spec)
+        _, body = self._get(f"/chart/{analysis}", year=year, event=event, params=json.dumps(params))
+        return _read_chart(body)
+
+    def drivers(self, year, event):
+        return json.loads(self._get("/drivers", year=year, event=event)[1])
+
+    def prefetch(self, year, event, session_types=DEFAULT_SESSION_TYPES, telemetry=False):
+        _, body = self._get("/prefetch", year=year, event=event, session_types=",".join(session_types),
+                            telemetry=int(telemetry))
+        return [RemoteJob(self, year, event, state) for state in json.loads(body)]
+
+    def _job_state(self, year, event, session_type):
+        status, body = self._get("/job", year=year, event=event, session_type=session_type)
+        return None if status == 204 else json.loads(body)
+
+    def job(self, year, event, session_type):
+        state = self._job_state(year, event, session_type)
+        return None if state is None else RemoteJob(self, year, event, state)
+
+    def stats(self):
+        return json.loads(self._get("/stats")[1])
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    service = None
+
+    def _send(self, status, body=b'', content_type='application/octet-stream'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = {key: values[0] for key, values in urllib.parse.parse_qs(url.query).items()}
+        route, _, analysis = url.path.strip('/').partition('/')
+        try:
+            if route == 'stats':
+                return self._send(200, json.dumps(self.service.stats()).encode(), 'application/json')
+
+            year, event = int(query['year']), query['event']
+            params = tuple(json.loads(query.get('params', '[]')))
+            if route == 'figure' and analysis in FIGURES:
+                with get_tracer().trace(analysis, year=year, event=event, params=params):
+                    png = self.service.figure(analysis, year, event, *params)
+                return self._send(204) if png is None else self._send(200, png, 'image/png')
+            if route == 'chart' and analysis in CHARTS:
+                with get_tracer().trace(f"{analysis}_chart", year=year, event=event, params=params):
+                    data, spec = self.service.chart(analysis, year, event, *params)
+                return self._send(200, _chart_bytes(data, spec), 'application/vnd.apache.arrow.stream')
+            if route == 'drivers':
+                return self._send(200, json.dumps(self.service.drivers(year, event)).encode(), 'application/json')
+            if route == 'prefetch':
+                jobs = self.service.prefetch(year, event, tuple(query.get('session_types', 'Q,R').split(',')),
+                                             bool(int(query.get('telemetry', '0'))))
+                return self._send(202, json.dumps([job.state() for job in jobs]).encode(), 'application/json')
+            if route == 'job':
+                job = self.service.job(year, event, query['session_type'])
+                if job is None:
+                    return self._send(204)
+                return self._send(200, json.dumps(job.state()).encode(), 'application/json')
+            return self._send(404, f"Unknown request {url.path}".encode(), 'text/plain')
+        except (KeyError, ValueError) as e:
+            return self._send(400, f"Bad request: {e}".encode(), 'text/plain')
+        except Exception as e:
+            return self._send(500, str(e).encode(), 'text/plain')
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def get_service():
+    # A client for the service process when F1_SERVICE_URL is set, otherwise
+    # the analyses run in this process.
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            url = os.environ.get("F1_SERVICE_URL")
+            _shared_service = ServiceClient(url) if url else AnalysisService()
+        return _shared_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard's session loading and analyses to its front ends.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    _Handler.service = AnalysisService()
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    server.daemon_threads = True
+    print(f"Serving F1 analyses on http://{args.host}:{server.server_port}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
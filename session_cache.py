@@ -0,0 +1,170 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from data_source import get_source
+from tracing import span
+
+
+# Optional parts of a session that can be loaded on top of laps/results.
+LOAD_FLAGS = ('telemetry', 'weather', 'messages')
+
+# FastF1 loads each part of a session in its own step. Calling these directly
+# lets a laps-only session be upgraded without parsing the timing data again.
+_UPGRADE_STEPS = {
+    'telemetry': '_load_telemetry',
+    'weather': '_load_weather_data',
+    'messages': '_load_race_control_messages',
+}
+
+DEFAULT_MAX_BYTES = int(os.environ.get("F1_SESSION_CACHE_MB", "2048")) * 1024 * 1024
+
+
+def _frame_bytes(df):
+    if isinstance(df, pd.DataFrame):
+        return int(df.memory_usage(index=True, deep=True).sum())
+    return 0
+
+
+def estimate_session_bytes(session):
+    total = 0
+    for attr in ('_laps', '_results', '_weather_data', '_race_control_messages'):
+        total += _frame_bytes(getattr(session, attr, None))
+    for attr in ('_car_data', '_pos_data'):
+        for df in (getattr(session, attr, None) or {}).values():
+            total += _frame_bytes(df)
+    return total
+
+
+def session_key(year, event, session_type):
+    return (int(year), str(event).strip().lower(), str(session_type).strip().upper())
+
+
+class _Entry:
+
+    def __init__(self, session):
+        self.session = session
+        self.flags = set()
+        self.loaded = False
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+
+class SessionCache:
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, source=None):
+        self.max_bytes = max_bytes
+        self.source = source or get_source()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.upgrades = 0
+        self.evictions = 0
+
+    def get(self, year, event, session_type, telemetry=False, weather=False, messages=False):
+        key = session_key(year, event, session_type)
+        wanted = {flag for flag, on in zip(LOAD_FLAGS, (telemetry, weather, messages)) if on}
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # The session object is fetched under the entry's own lock
+                # below: get_session() can look up the event schedule over
+                # the network, which must not hold up every other session.
+                entry = self._entries[key] = _Entry(None)
+            else:
+                self._entries.move_to_end(key)
+
+        with entry.lock:
+            if entry.session is None:
+                with span('fetch', session=session_type):
+                    entry.session = self.source.get_session(year, event, session_type)
+            if not entry.loaded:
+                with span('load.session', session=session_type, parts=sorted(wanted)):
+                    entry.session.load(laps=True, telemetry=telemetry, weather=weather, messages=messages)
+                entry.flags = wanted
+                entry.loaded = True
+                outcome = 'miss'
+            elif wanted <= entry.flags:
+                outcome = 'hit'
+            else:
+                with span('load.upgrade', session=session_type, parts=sorted(wanted - entry.flags)):
+                    self._upgrade(entry, wanted - entry.flags)
+                outcome = 'upgrade'
+            nbytes = estimate_session_bytes(entry.session) if outcome != 'hit' else entry.nbytes
+
+        with self._lock:
+            if outcome == 'hit':
+                self.hits += 1
+            elif outcome == 'miss':
+                self.misses += 1
+            else:
+                self.upgrades += 1
+            if self._entries.get(key) is entry:
+                self._bytes += nbytes - entry.nbytes
+                entry.nbytes = nbytes
+                self._evict(keep=key)
+
+        return entry.session
+
+    def _upgrade(self, entry, missing):
+        session = entry.session
+        if all(hasattr(session, _UPGRADE_STEPS[flag]) for flag in missing):
+            for flag in LOAD_FLAGS:
+                if flag in missing:
+                    getattr(session, _UPGRADE_STEPS[flag])(livedata=None)
+        else:
+            flags = entry.flags | missing
+            session.load(laps=True, **{flag: flag in flags for flag in LOAD_FLAGS})
+        entry.flags |= missing
+
+    def _evict(self, keep):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                self._entries.move_to_end(key)
+                key, entry = next(iter(self._entries.items()))
+            del self._entries[key]
+            self._bytes -= entry.nbytes
+            self.evictions += 1
+
+    def discard(self, year, event, session_type):
+        with self._lock:
+            entry = self._entries.pop(session_key(year, event, session_type), None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'upgrades': self.upgrades,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_cache():
+    # Streamlit reruns re-execute the app script but keep imported modules, so
+    # this instance is shared by every rerun and every browser session.
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = SessionCache()
+        return _shared_cache
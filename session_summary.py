@@ -0,0 +1,52 @@
+import pandas as pd
+
+from tracing import traced
+
+
+# Per-session aggregates and team colours. Nothing here plots, so the
+# summary store and batch ingestion can use it without the plotting code.
+
+def team_color(team, session):
+    # Replayed sessions carry their recorded colours (replay.ReplaySession),
+    # live ones are looked up by fastf1.plotting.
+    if hasattr(session, 'recorded_team_colors'):
+        return session.recorded_team_colors().get(team, 'grey')
+    import fastf1.plotting
+
+    return fastf1.plotting.get_team_color(team, session=session)
+
+
+def driver_color_mapping(session):
+    if hasattr(session, 'recorded_driver_colors'):
+        return session.recorded_driver_colors()
+    import fastf1.plotting
+
+    return fastf1.plotting.get_driver_color_mapping(session=session)
+
+
+def team_color_mapping(teams, session):
+    return {team: team_color(team, session) for team in pd.unique(teams)}
+
+
+# Per-driver session summary
+
+@traced('compute.driver_summary')
+def driver_summary(session):
+    # One row per driver: fastest personal-best lap, personal-best sectors,
+    # their sum (theoretical best lap), team and team colour.
+    laps = session.laps
+
+    personal_bests = laps.loc[(laps['IsPersonalBest'] == True) & laps['LapTime'].notna()]  # noqa: E712
+    fastest = personal_bests.loc[personal_bests.groupby('Driver')['LapTime'].idxmin(), ['Driver', 'LapTime']]
+
+    summary = laps.groupby('Driver').agg(
+        Team=('Team', 'first'),
+        Sector1Time=('Sector1Time', 'min'),
+        Sector2Time=('Sector2Time', 'min'),
+        Sector3Time=('Sector3Time', 'min'),
+    )
+    summary['TheoreticalTime'] = summary['Sector1Time'] + summary['Sector2Time'] + summary['Sector3Time']
+    summary['TeamColor'] = summary['Team'].map(team_color_mapping(summary['Team'].dropna(), session))
+    summary = summary.join(fastest.set_index('Driver')).reset_index()
+
+    return summary[['Driver', 'Team', 'TeamColor', 'LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time', 'TheoreticalTime']]
@@ -0,0 +1,157 @@
+import contextlib
+import datetime
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from session_summary import driver_summary
+from tracing import traced
+
+
+DEFAULT_PATH = os.environ.get("F1_SUMMARY_DB", "f1_summary.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    year INTEGER NOT NULL,
+    round INTEGER,
+    session_type TEXT NOT NULL,
+    event_name TEXT NOT NULL,
+    official_name TEXT,
+    country TEXT,
+    location TEXT,
+    session_name TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    PRIMARY KEY (year, event_name, session_type)
+);
+CREATE TABLE IF NOT EXISTS driver_summary (
+    year INTEGER NOT NULL,
+    event_name TEXT NOT NULL,
+    session_type TEXT NOT NULL,
+    driver TEXT NOT NULL,
+    team TEXT,
+    team_color TEXT,
+    lap_time REAL,
+    sector1_time REAL,
+    sector2_time REAL,
+    sector3_time REAL,
+    theoretical_time REAL,
+    PRIMARY KEY (year, event_name, session_type, driver)
+);
+CREATE INDEX IF NOT EXISTS sessions_lookup ON sessions (year, session_type);
+"""
+
+# DataFrame column -> driver_summary column, times are stored in seconds
+_TIME_COLUMNS = {
+    'LapTime': 'lap_time',
+    'Sector1Time': 'sector1_time',
+    'Sector2Time': 'sector2_time',
+    'Sector3Time': 'sector3_time',
+    'TheoreticalTime': 'theoretical_time',
+}
+
+
+class SummaryStore:
+    # Per-session driver aggregates (fastest lap, personal-best sectors,
+    # theoretical best, team and team colour) keyed by year/event/session,
+    # so the qualifying and sector views never need the raw laps again.
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, session, session_type, summary):
+        event = session.event
+        session_type = session_type.upper()
+        rows = [
+            (event.year, event['EventName'], session_type, row['Driver'], row['Team'], row['TeamColor'],
+             *(None if pd.isna(row[column]) else row[column].total_seconds() for column in _TIME_COLUMNS))
+            for _, row in summary.iterrows()
+        ]
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM driver_summary WHERE year = ? AND event_name = ? AND session_type = ?",
+                         (event.year, event['EventName'], session_type))
+            conn.executemany(f"INSERT INTO driver_summary VALUES ({', '.join('?' * 11)})", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (event.year, int(event['RoundNumber']), session_type, event['EventName'],
+                 event.get('OfficialEventName'), event.get('Country'), event.get('Location'), session.name,
+                 datetime.datetime.now(datetime.timezone.utc).isoformat()),
+            )
+
+    def find(self, year, event, session_type):
+        # `event` is a round number or an exact event name, as resolved by
+        # the data source (data_source.*.event_info); free text from the
+        # sidebar is never matched here, so a lookup cannot land on another
+        # round. Returns (event name, session name, ingested at) or None.
+        if str(event).strip().isdigit():
+            column, value = "round", int(event)
+        else:
+            column, value = "event_name", str(event)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT event_name, session_name, ingested_at FROM sessions "
+                f"WHERE year = ? AND session_type = ? AND {column} = ?",
+                (int(year), session_type.upper(), value),
+            ).fetchone()
+        return row
+
+    @traced('load.summary')
+    def get(self, year, event, session_type, updated_after=None):
+        # None when the session is not stored, or was ingested before
+        # `updated_after` (the time its source data last changed).
+        found = self.find(year, event, session_type)
+        if found is None:
+            return None
+        event_name, session_name, ingested_at = found
+        if updated_after is not None and pd.Timestamp(ingested_at) < pd.Timestamp(updated_after):
+            return None
+
+        with self._connect() as conn:
+            summary = pd.read_sql_query(
+                "SELECT driver, team, team_color, " + ", ".join(_TIME_COLUMNS.values()) +
+                " FROM driver_summary WHERE year = ? AND event_name = ? AND session_type = ?",
+                conn, params=(int(year), event_name, session_type.upper()),
+            )
+
+        summary.columns = ['Driver', 'Team', 'TeamColor', *_TIME_COLUMNS]
+        for column in _TIME_COLUMNS:
+            summary[column] = pd.to_timedelta(summary[column], unit='s').dt.round('ms')
+        summary.attrs.update(year=int(year), event_name=event_name, session_name=session_name)
+        return summary
+
+    def has(self, year, event, session_type):
+        return self.find(year, event, session_type) is not None
+
+
+def ingest(session, session_type, store=None):
+    store = store or SummaryStore()
+    summary = driver_summary(session)
+    store.put(session, session_type, summary)
+    summary.attrs.update(year=session.event.year, event_name=session.event['EventName'], session_name=session.name)
+    return summary
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_store():
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = SummaryStore()
+        return _shared_store
@@ -0,0 +1,240 @@
+import argparse
+import errno
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from acceleration import _seconds
+
+
+# Store layout: <root>/<year>/<event slug>/<session slug>/ (the same as a
+# replay snapshot, so replay.find_session finds a session by round) with one .npy file per channel and index.npz mapping (driver, lap) to a
+# [start, stop) range of every channel. Time is seconds since the lap start
+# and Distance metres since the lap start, both computed when writing.
+CHANNELS = {
+    'Time': np.float32,
+    'Distance': np.float32,
+    'Speed': np.float32,
+    'Throttle': np.float32,
+    'Brake': np.uint8,
+}
+
+DEFAULT_ROOT = os.environ.get("F1_TELEMETRY_STORE", "telemetry_store")
+
+
+def _lap_ranges(sample_times, lap_starts, lap_ends):
+    # Index ranges of the car data samples inside every lap of one driver.
+    starts = np.searchsorted(sample_times, lap_starts, side='left')
+    stops = np.searchsorted(sample_times, lap_ends, side='right')
+    return starts, np.maximum(stops, starts)
+
+
+def _gather(starts, stops):
+    # Concatenated sample indices of all ranges, without a Python loop.
+    lengths = stops - starts
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum()), lengths
+
+
+def session_columns(session):
+    # Cuts the car data of an already loaded session into laps. Returns the
+    # concatenated channels and the lap index, one entry per stored lap.
+    laps = session.laps
+    laps = laps.loc[laps['LapStartTime'].notna() & laps['Time'].notna(),
+                    ['Driver', 'DriverNumber', 'LapNumber', 'LapStartTime', 'Time']]
+
+    columns = {channel: [] for channel in CHANNELS}
+    index = {'driver': [], 'lap': [], 'length': []}
+    for number, driver_laps in laps.groupby('DriverNumber', sort=False):
+        car = session.car_data.get(str(number))
+        if car is None or car.empty:
+            continue
+
+        sample_times = _seconds(car['SessionTime'])
+        starts, stops = _lap_ranges(sample_times, _seconds(driver_laps['LapStartTime']),
+                                    _seconds(driver_laps['Time']))
+        stored = stops > starts
+        if not stored.any():
+            continue
+        driver_laps, starts, stops = driver_laps[stored], starts[stored], stops[stored]
+        samples, lengths = _gather(starts, stops)
+        first = np.cumsum(lengths) - lengths
+
+        time = sample_times[samples] - np.repeat(_seconds(driver_laps['LapStartTime']), lengths)
+        speed = np.asarray(car['Speed'], dtype=np.float64)[samples]
+        step = np.zeros(len(samples))
+        step[1:] = speed[1:] / 3.6 * np.diff(time)
+        step[first] = 0
+        distance = np.cumsum(step)
+        distance -= np.repeat(distance[first], lengths)
+
+        columns['Time'].append(time)
+        columns['Distance'].append(distance)
+        columns['Speed'].append(speed)
+        columns['Throttle'].append(np.asarray(car['Throttle'], dtype=np.float64)[samples])
+        columns['Brake'].append(np.asarray(car['Brake'], dtype=np.float64)[samples])
+        index['driver'].append(driver_laps['Driver'].to_numpy().astype(str))
+        index['lap'].append(driver_laps['LapNumber'].to_numpy().astype(np.int32))
+        index['length'].append(lengths)
+
+    if not index['driver']:
+        raise ValueError(f"{session.event['EventName']} {session.name} has no car data to store.")
+
+    columns = {channel: np.concatenate(parts).astype(CHANNELS[channel]) for channel, parts in columns.items()}
+    lengths = np.concatenate(index['length']).astype(np.int64)
+    index = {
+        'driver': np.concatenate(index['driver']),
+        'lap': np.concatenate(index['lap']),
+        'start': np.cumsum(lengths) - lengths,
+        'stop': np.cumsum(lengths),
+    }
+    return columns, index
+
+
+class StoredSession:
+    # Read-only view of one stored session. Channels are memory-mapped, so
+    # every slice is a view into the page cache shared by all processes.
+
+    def __init__(self, path):
+        self.path = path
+        with np.load(os.path.join(path, 'index.npz')) as index:
+            self._lookup = {
+                (str(driver), int(lap)): (int(start), int(stop))
+                for driver, lap, start, stop in zip(index['driver'], index['lap'], index['start'], index['stop'])
+            }
+        self._columns = {
+            channel: np.load(os.path.join(path, f"{channel}.npy"), mmap_mode='r') for channel in CHANNELS
+        }
+
+    def lap(self, driver, lap_number, channels=tuple(CHANNELS)):
+        # {channel: array} for one lap, or None when it was not stored.
+        span = self._lookup.get((driver, int(lap_number)))
+        if span is None:
+            return None
+        start, stop = span
+        return {channel: self._columns[channel][start:stop] for channel in channels}
+
+    def laps(self):
+        return sorted(self._lookup)
+
+
+class TelemetryStore:
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def find(self, year, round_number, session_type):
+        # Sessions are looked up by round only: callers resolve the sidebar's
+        # free text with source.event_info() first, as the session itself
+        # was resolved, instead of matching it against the stored names.
+        from replay import find_session
+
+        try:
+            return find_session(self.root, year, int(round_number), session_type)
+        except (ValueError, OSError):
+            return None
+
+    def has(self, year, round_number, session_type):
+        return self.find(year, round_number, session_type) is not None
+
+    def open(self, year, round_number, session_type):
+        path = self.find(year, round_number, session_type)
+        if path is None:
+            return None
+        with self._lock:
+            stored = self._open.get(path)
+            if stored is None:
+                stored = self._open[path] = StoredSession(path)
+            return stored
+
+    def write(self, session):
+        # Writes into a temporary directory that is renamed into place, so
+        # readers never see a partial session. A directory cannot replace a
+        # non-empty one in a single rename, so an existing session is first
+        # renamed aside: for that moment the session is missing, not partial,
+        # and readers fall back to the session's own telemetry.
+        from replay import session_dir
+
+        columns, index = session_columns(session)
+        event = session.event
+        path = session_dir(self.root, event.year, event['EventName'], session.name)
+        staging = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(staging, exist_ok=True)
+
+        for channel, values in columns.items():
+            np.save(os.path.join(staging, f"{channel}.npy"), values)
+        np.savez(os.path.join(staging, 'index.npz'), **index)
+        meta = {
+            'year': int(event.year),
+            'event': {key: None if pd.isna(event.get(key)) else str(event.get(key))
+                      for key in ('EventName', 'OfficialEventName', 'Country', 'Location')},
+            'session_name': session.name,
+            'channels': list(CHANNELS),
+        }
+        meta['event']['RoundNumber'] = int(event['RoundNumber'])
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=1)
+
+        retired = []
+        with self._lock:
+            self._open.pop(path, None)
+            while True:
+                # A writer in another process can put its copy in place
+                # between the two renames; it is retired as well and the
+                # rename is tried again.
+                aside = f"{path}.old-{os.getpid()}-{len(retired)}"
+                try:
+                    os.rename(path, aside)
+                    retired.append(aside)
+                except FileNotFoundError:
+                    pass
+                try:
+                    os.replace(staging, path)
+                    break
+                except OSError as e:
+                    if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                        raise
+        # Processes that still map the old files keep them until they close.
+        for aside in retired:
+            shutil.rmtree(aside, ignore_errors=True)
+        return path
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_telemetry_store():
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = TelemetryStore()
+        return _shared_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the per-lap car data channels of F1 sessions to the telemetry store.")
+    parser.add_argument("year", type=int)
+    parser.add_argument("event")
+    parser.add_argument("sessions", nargs="+", help="Session identifiers, e.g. R Q")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Telemetry store directory")
+    args = parser.parse_args()
+
+    from data_source import get_source
+
+    source = get_source()
+    store = TelemetryStore(args.root)
+    for session_type in args.sessions:
+        session = source.get_session(args.year, args.event, session_type)
+        session.load(laps=True, telemetry=True, weather=False, messages=False)
+        print(f"Stored {session.event['EventName']} {session.name} in {store.write(session)}")
+
+
+if __name__ == "__main__":
+    main()
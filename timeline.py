@@ -0,0 +1,186 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from acceleration import _seconds
+from tracing import span
+
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("F1_TIMELINE_CACHE_SIZE", "64"))
+
+# Seconds to the car ahead below which a driver counts as in its DRS window.
+DRS_WINDOW = 1.0
+
+
+class RaceTimeline:
+    # How a race unfolded, as drivers x laps matrices. `times` is the race
+    # time at which each driver completed each lap (seconds from the start,
+    # NaN for laps not completed); positions, gaps to the leader and intervals
+    # to the car ahead are derived from it for all drivers and laps at once.
+
+    def __init__(self, drivers, times, grid=None):
+        self.drivers = list(drivers)
+        self.times = times
+        self.grid = grid
+        self.lap_numbers = np.arange(1, times.shape[1] + 1)
+
+        completed = np.isfinite(times)
+        # Running order at the end of each lap: the order in which the drivers
+        # crossed the line on that lap, so lapped cars sort behind the leaders.
+        order = np.argsort(times, axis=0, kind='stable')
+        ranks = np.broadcast_to(np.arange(1, len(self.drivers) + 1, dtype=np.float64)[:, None], times.shape)
+        self.positions = np.empty(times.shape)
+        np.put_along_axis(self.positions, order, ranks, axis=0)
+        self.positions[~completed] = np.nan
+
+        self.gaps = times - np.fmin.reduce(times, axis=0)
+
+        behind = np.full(times.shape, np.nan)
+        behind[1:] = np.diff(np.take_along_axis(times, order, axis=0), axis=0)
+        self.intervals = np.empty(times.shape)
+        np.put_along_axis(self.intervals, order, behind, axis=0)
+
+    def __len__(self):
+        return len(self.drivers)
+
+    def laps_completed(self):
+        return np.where(np.isfinite(self.times), self.lap_numbers, 0).max(axis=1)
+
+    def finishing_order(self):
+        # Indices of the drivers classified by laps completed, then by the
+        # time they completed their last lap.
+        last = np.fmax.reduce(self.times, axis=1)
+        return np.lexsort((np.nan_to_num(last, nan=np.inf), -self.laps_completed()))
+
+    def position_changes(self):
+        # Places gained (positive) or lost on each lap; the first lap is
+        # measured from the grid when it is known.
+        start = self.grid if self.grid is not None else np.full(len(self.drivers), np.nan)
+        previous = np.column_stack([start, self.positions[:, :-1]])
+        return previous - self.positions
+
+    def summary(self):
+        finish = np.empty(len(self.drivers))
+        finish[self.finishing_order()] = np.arange(1, len(self.drivers) + 1)
+        start = self.grid if self.grid is not None else self.positions[:, 0]
+        changes = self.position_changes()
+
+        summary = pd.DataFrame({
+            'Driver': self.drivers,
+            'Start': start,
+            'Finish': finish,
+            'Gained': start - finish,
+            'LapsLed': (self.positions == 1).sum(axis=1),
+            'PlacesGained': np.nansum(np.clip(changes, 0, None), axis=1),
+            'PlacesLost': -np.nansum(np.clip(changes, None, 0), axis=1),
+            'LapsInDRS': (self.intervals < DRS_WINDOW).sum(axis=1),
+            'Laps': self.laps_completed(),
+        })
+        return summary.sort_values('Finish').reset_index(drop=True)
+
+    def gaps_frame(self):
+        return pd.DataFrame(self.gaps.T, index=pd.Index(self.lap_numbers, name='LapNumber'), columns=self.drivers)
+
+    def positions_frame(self):
+        return pd.DataFrame(self.positions.T, index=pd.Index(self.lap_numbers, name='LapNumber'),
+                            columns=self.drivers)
+
+
+def build_timeline(laps, grid=None):
+    # laps has one row per lap with 'Driver', 'LapNumber', 'Time' (session
+    # time at the end of the lap) and 'LapStartTime', like race.laps. The
+    # matrix is filled by one scatter of all rows; `grid` maps drivers to
+    # their grid positions.
+    laps = laps.dropna(subset=['LapNumber', 'Time'])
+    if not len(laps):
+        raise ValueError("The session has no timed laps.")
+    codes, drivers = pd.factorize(laps['Driver'])
+    lap_index = laps['LapNumber'].to_numpy(dtype=np.int64) - 1
+    ends = _seconds(laps['Time'])
+
+    # Race time counts from the first car starting lap 1, so the matrix does
+    # not depend on how long the session ran before the start.
+    starts = _seconds(laps['LapStartTime'])[lap_index == 0]
+    start = np.nanmin(starts) if np.isfinite(starts).any() else 0.0
+
+    times = np.full((len(drivers), lap_index.max() + 1), np.nan)
+    times[codes, lap_index] = ends - start
+
+    if grid is not None:
+        grid = pd.Series(grid, dtype=np.float64).reindex(drivers).to_numpy(copy=True)
+        grid[grid <= 0] = len(drivers)  # pit lane starts have grid position 0
+    return RaceTimeline(drivers, times, grid)
+
+
+def timeline_from_session(session):
+    results = session.results
+    grid = None
+    if results is not None and 'GridPosition' in results and len(results):
+        grid = dict(zip(results['Abbreviation'], results['GridPosition']))
+    return build_timeline(session.laps, grid)
+
+
+def timeline_key(session):
+    event = session.event
+    return (int(event.year), event['EventName'], session.name)
+
+
+class TimelineCache:
+    # Timelines keyed by session (year, event name, session name), so the
+    # Race Timeline tab and the season rollups build each one once whether
+    # they loaded the race by name or by round number. A timeline is a few
+    # KB, so the cache is bounded by its number of sessions.
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._timelines = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session):
+        key = timeline_key(session)
+        with span('cache.timeline') as record:
+            with self._lock:
+                timeline = self._timelines.get(key)
+                if timeline is None:
+                    self.misses += 1
+                else:
+                    self._timelines.move_to_end(key)
+                    self.hits += 1
+            record['hit'] = timeline is not None
+        if timeline is None:
+            timeline = timeline_from_session(session)
+            self.put(key, timeline)
+        return timeline
+
+    def put(self, key, timeline):
+        with self._lock:
+            self._timelines[key] = timeline
+            self._timelines.move_to_end(key)
+            while len(self._timelines) > self.max_entries:
+                self._timelines.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._timelines.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._timelines),
+                    'max_entries': self.max_entries}
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_timeline_cache():
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = TimelineCache()
+        return _shared_cache
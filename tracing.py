@@ -0,0 +1,179 @@
+import argparse
+import contextlib
+import contextvars
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+
+# A trace is one user action (a tab generating its plot); spans are the timed
+# steps inside it: session fetch and load, each analysis computation, figure
+# plotting and rendering. Spans opened anywhere in the call stack attach to
+# the trace of the current context, so the instrumented modules do not need
+# to know which tab called them.
+
+DEFAULT_LOG = os.environ.get("F1_TRACE_LOG", "f1_traces.jsonl")
+DEFAULT_HISTORY = int(os.environ.get("F1_TRACE_HISTORY", "20"))
+
+_current = contextvars.ContextVar("f1_trace", default=None)
+
+
+class Trace:
+
+    def __init__(self, tab, attrs):
+        self.tab = tab
+        self.attrs = attrs
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.clock = time.perf_counter()
+        self.spans = []
+        self.duration = None
+        self.error = None
+
+    def totals(self):
+        # Seconds per span category ('load', 'compute', ...), from the part
+        # of the span name before the first dot.
+        totals = defaultdict(float)
+        for span in self.spans:
+            totals[span['name'].split('.', 1)[0]] += span['duration']
+        return dict(totals)
+
+    def to_dict(self):
+        return {
+            'tab': self.tab,
+            'started': self.started.isoformat(),
+            'duration': self.duration,
+            'error': self.error,
+            'attrs': self.attrs,
+            'spans': self.spans,
+        }
+
+
+class Tracer:
+
+    def __init__(self, log_path=DEFAULT_LOG, history=DEFAULT_HISTORY):
+        self.log_path = log_path
+        self._recent = defaultdict(lambda: deque(maxlen=history))
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def trace(self, tab, **attrs):
+        trace = Trace(tab, attrs)
+        token = _current.set(trace)
+        try:
+            yield trace
+        except Exception as e:
+            trace.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            trace.duration = time.perf_counter() - trace.clock
+            _current.reset(token)
+            self._finish(trace)
+
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        # Outside a trace (benchmarks, batch ingestion) spans are not recorded.
+        trace = _current.get()
+        if trace is None:
+            yield {'name': name, **attrs}
+            return
+
+        start = time.perf_counter()
+        record = {'name': name, 'offset': start - trace.clock, 'duration': None, **attrs}
+        try:
+            yield record
+        finally:
+            record['duration'] = time.perf_counter() - start
+            trace.spans.append(record)
+
+    def record(self, tab, clock, spans=(), **attrs):
+        # Adds a trace for work timed without trace(), e.g. the dashboard's
+        # own imports, which run before the tracer exists. `clock` is the
+        # time.perf_counter() value the work started at.
+        trace = Trace(tab, attrs)
+        trace.duration = time.perf_counter() - clock
+        trace.started -= datetime.timedelta(seconds=trace.duration)
+        trace.clock = clock
+        trace.spans = [{'offset': 0.0, **record} for record in spans]
+        self._finish(trace)
+        return trace
+
+    def _finish(self, trace):
+        with self._lock:
+            self._recent[trace.tab].append(trace)
+            if self.log_path:
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps(trace.to_dict(), default=str) + '\n')
+
+    def recent(self, tab):
+        with self._lock:
+            return list(self._recent.get(tab, ()))
+
+    def tabs(self):
+        with self._lock:
+            return [tab for tab, traces in self._recent.items() if traces]
+
+
+_shared_tracer = None
+_shared_lock = threading.Lock()
+
+
+def get_tracer():
+    global _shared_tracer
+    with _shared_lock:
+        if _shared_tracer is None:
+            _shared_tracer = Tracer()
+        return _shared_tracer
+
+
+def span(name, **attrs):
+    return get_tracer().span(name, **attrs)
+
+
+def traced(name):
+    # Decorator timing every call of a function as a span called `name`.
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def read_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentiles(traces, quantiles=(50, 90, 99)):
+    # {(tab, step): [p50, p90, p99, count]} over the total of each trace and
+    # the per-category span totals, in seconds.
+    samples = defaultdict(list)
+    for trace in traces:
+        samples[(trace['tab'], 'total')].append(trace['duration'])
+        totals = defaultdict(float)
+        for record in trace['spans']:
+            totals[record['name'].split('.', 1)[0]] += record['duration']
+        for category, seconds in totals.items():
+            samples[(trace['tab'], category)].append(seconds)
+    return {key: [*np.percentile(values, quantiles), len(values)] for key, values in sorted(samples.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise the latency percentiles of a dashboard trace log.")
+    parser.add_argument("log", nargs="?", default=DEFAULT_LOG)
+    args = parser.parse_args()
+
+    print(f"{'tab':<20} {'step':<10} {'p50':>8} {'p90':>8} {'p99':>8} {'count':>6}")
+    for (tab, step), (p50, p90, p99, count) in percentiles(read_log(args.log)).items():
+        print(f"{tab:<20} {step:<10} {p50:8.3f} {p90:8.3f} {p99:8.3f} {count:6d}")
+
+
+if __name__ == "__main__":
+    main()